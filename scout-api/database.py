@@ -5,12 +5,68 @@ Connects to Supabase/PostgreSQL to fetch opponent style markers.
 
 import os
 import asyncio
-from typing import Optional, Dict, Any, List
+import logging
+from typing import Optional, Dict, Any, List, Tuple, Callable
 import asyncpg
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger("scout.database")
+
+
+# Queries go through conn.fetch*/pool.fetch*, which prepare each statement
+# once per pooled connection (asyncpg's statement cache) and reuse it, so
+# Postgres skips re-parsing/planning on repeat calls.
+STYLE_MARKERS_SQL = """
+    SELECT style_markers
+    FROM opponents
+    WHERE platform = $1 AND LOWER(username) = LOWER($2)
+"""
+
+# One row per (platform, username) argument set, even when the opponent is
+# unknown, so fetchmany results stay aligned with the input pairs.
+STYLE_MARKERS_BULK_SQL = """
+    SELECT (
+        SELECT style_markers
+        FROM opponents
+        WHERE platform = $1 AND LOWER(username) = LOWER($2)
+        LIMIT 1
+    ) AS style_markers
+"""
+
+OPPONENT_HISTORY_SQL = """
+    SELECT 
+        move_san,
+        COUNT(*) as frequency,
+        MAX(played_at) as last_played,
+        AVG(CASE 
+            WHEN result = 'win' THEN 1.0 
+            WHEN result = 'draw' THEN 0.5 
+            ELSE 0.0 
+        END) as avg_result
+    FROM game_moves gm
+    JOIN games g ON g.id = gm.game_id
+    WHERE g.platform = $1 
+      AND LOWER(g.opponent_username) = LOWER($2)
+      AND gm.fen = $3
+    GROUP BY move_san
+    ORDER BY frequency DESC
+    LIMIT $4
+"""
+
+# Stored marker_key -> handler(metrics_json) returning (predictor field, value)
+_MARKER_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Tuple[str, float]]] = {
+    "aggression": lambda m: ("aggression_index", float(m.get("value", 50))),
+    "queen_trade": lambda m: ("queen_trade_avoidance", float(m.get("avoidance_rate", 50))),
+    "material": lambda m: ("material_greed", float(m.get("greed_score", 50))),
+    "complexity": lambda m: ("complexity_preference", float(m.get("preference", 50))),
+    "space": lambda m: ("space_expansion", float(m.get("expansion_rate", 50))),
+    # Derive blunder rate from accuracy
+    "accuracy": lambda m: ("blunder_rate", max(0, min(100, 100 - float(m.get("value", 95))))),
+}
+
 
 class Database:
     """Async database connection manager."""
@@ -22,7 +78,7 @@ class Database:
     async def connect(self):
         """Initialize the connection pool."""
         if not self._connection_string:
-            print("Warning: DATABASE_URL not set. Database features disabled.")
+            logger.warning("DATABASE_URL not set. Database features disabled.")
             return
         
         try:
@@ -30,13 +86,29 @@ class Database:
                 self._connection_string,
                 min_size=1,
                 max_size=5,
-                command_timeout=30
+                command_timeout=30,
+                init=self._setup_connection
             )
-            print("Database connection pool initialized.")
+            logger.info("Database connection pool initialized.")
         except Exception as e:
-            print(f"Warning: Could not connect to database: {e}")
+            logger.warning("Could not connect to database: %s", e)
             self.pool = None
     
+    @staticmethod
+    async def _setup_connection(conn: asyncpg.Connection):
+        """
+        Per-connection setup: decode JSONB with orjson.
+        Statements are prepared lazily by the queries themselves, so a query
+        against a missing table only fails that query, not the pool.
+        """
+        # asyncpg hands JSONB back as a str by default; decode it in C instead
+        await conn.set_type_codec(
+            "jsonb",
+            encoder=lambda value: orjson.dumps(value).decode(),
+            decoder=orjson.loads,
+            schema="pg_catalog",
+        )
+    
     async def close(self):
         """Close the connection pool."""
         if self.pool:
@@ -58,59 +130,65 @@ class Database:
         
         try:
             # Query the opponents table for style markers
-            row = await self.pool.fetchrow(
-                """
-                SELECT style_markers
-                FROM opponents
-                WHERE platform = $1 AND LOWER(username) = LOWER($2)
-                """,
-                platform,
-                username
-            )
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow(STYLE_MARKERS_SQL, platform, username)
             
-            if not row or not row["style_markers"]:
+            if not row:
                 return None
             
-            markers = row["style_markers"]
-            
-            # Convert stored markers to the format expected by the predictor
-            result = {
-                "aggression_index": 50.0,
-                "queen_trade_avoidance": 50.0,
-                "material_greed": 50.0,
-                "complexity_preference": 50.0,
-                "space_expansion": 50.0,
-                "blunder_rate": 5.0,
-                "time_pressure_weakness": 50.0,
-            }
+            return self._parse_style_markers(row["style_markers"])
             
-            # Map stored markers to predictor format
-            if isinstance(markers, list):
-                for marker in markers:
-                    key = marker.get("marker_key", "")
-                    metrics = marker.get("metrics_json", {})
-                    
-                    # Map specific markers
-                    if key == "aggression":
-                        result["aggression_index"] = float(metrics.get("value", 50))
-                    elif key == "queen_trade":
-                        result["queen_trade_avoidance"] = float(metrics.get("avoidance_rate", 50))
-                    elif key == "material":
-                        result["material_greed"] = float(metrics.get("greed_score", 50))
-                    elif key == "complexity":
-                        result["complexity_preference"] = float(metrics.get("preference", 50))
-                    elif key == "space":
-                        result["space_expansion"] = float(metrics.get("expansion_rate", 50))
-                    elif key == "accuracy":
-                        # Derive blunder rate from accuracy
-                        accuracy = float(metrics.get("value", 95))
-                        result["blunder_rate"] = max(0, min(100, 100 - accuracy))
+        except Exception:
+            logger.exception("Error fetching style markers")
+            return None
+    
+    async def fetch_style_markers_bulk(
+        self,
+        pairs: List[Tuple[str, str]]
+    ) -> List[Optional[Dict[str, float]]]:
+        """
+        Fetch style markers for many (platform, username) pairs in one round-trip.
+        
+        Returns one entry per input pair (None where not found).
+        """
+        if not self.pool or not pairs:
+            return [None] * len(pairs)
+        
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetchmany(STYLE_MARKERS_BULK_SQL, pairs)
             
-            return result
+            return [self._parse_style_markers(row["style_markers"]) for row in rows]
             
-        except Exception as e:
-            print(f"Error fetching style markers: {e}")
+        except Exception:
+            logger.exception("Error fetching style markers in bulk")
+            return [None] * len(pairs)
+    
+    @staticmethod
+    def _parse_style_markers(markers: Any) -> Optional[Dict[str, float]]:
+        """Convert stored style markers to the format expected by the predictor."""
+        if not markers:
             return None
+        
+        result = {
+            "aggression_index": 50.0,
+            "queen_trade_avoidance": 50.0,
+            "material_greed": 50.0,
+            "complexity_preference": 50.0,
+            "space_expansion": 50.0,
+            "blunder_rate": 5.0,
+            "time_pressure_weakness": 50.0,
+        }
+        
+        # Map stored markers to predictor format
+        if isinstance(markers, list):
+            for marker in markers:
+                handler = _MARKER_HANDLERS.get(marker.get("marker_key", ""))
+                if handler:
+                    field, value = handler(marker.get("metrics_json", {}))
+                    result[field] = value
+        
+        return result
     
     async def fetch_opponent_history(
         self,
@@ -130,31 +208,8 @@ class Database:
         try:
             # Query the game_positions or similar table
             # This depends on how position data is stored
-            rows = await self.pool.fetch(
-                """
-                SELECT 
-                    move_san,
-                    COUNT(*) as frequency,
-                    MAX(played_at) as last_played,
-                    AVG(CASE 
-                        WHEN result = 'win' THEN 1.0 
-                        WHEN result = 'draw' THEN 0.5 
-                        ELSE 0.0 
-                    END) as avg_result
-                FROM game_moves gm
-                JOIN games g ON g.id = gm.game_id
-                WHERE g.platform = $1 
-                  AND LOWER(g.opponent_username) = LOWER($2)
-                  AND gm.fen = $3
-                GROUP BY move_san
-                ORDER BY frequency DESC
-                LIMIT $4
-                """,
-                platform,
-                username,
-                fen,
-                limit
-            )
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(OPPONENT_HISTORY_SQL, platform, username, fen, limit)
             
             return [
                 {
@@ -166,8 +221,8 @@ class Database:
                 for row in rows
             ]
             
-        except Exception as e:
-            print(f"Error fetching opponent history: {e}")
+        except Exception:
+            logger.exception("Error fetching opponent history")
             return []
 
 
@@ -5,45 +5,197 @@ Provides Multi-PV analysis with configurable depth.
 
 import chess
 import chess.engine
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional, Tuple
 import asyncio
+import logging
+import os
 
 
-class EngineWrapper:
-    """Wrapper for Stockfish engine with Multi-PV support."""
-    
-    def __init__(self, stockfish_path: str = "stockfish"):
-        """Initialize the engine."""
+logger = logging.getLogger("scout.engine")
+
+# Default pool size: one single-threaded Stockfish per two cores
+DEFAULT_POOL_SIZE = max(1, (os.cpu_count() or 2) // 2)
+
+# Max cached analyses (position lists, single-move and move-list evals each)
+ANALYSIS_CACHE_SIZE = 10_000
+
+# Max parsed FENs kept as board templates
+FEN_CACHE_SIZE = 2048
+
+
+@lru_cache(maxsize=FEN_CACHE_SIZE)
+def _board_template(fen: str) -> chess.Board:
+    """Parsed board for a FEN; never handed out directly, only copied."""
+    return chess.Board(fen)
+
+
+def board_from_fen(fen: str) -> chess.Board:
+    """
+    A fresh, caller-owned Board for a FEN.
+    Repeat FENs (the same position hitting /predict, /analyze and the engine
+    cache lookups) copy a cached parse instead of re-tokenizing the FEN.
+    """
+    return _board_template(fen).copy(stack=False)
+
+
+def _parse_position(fen: str) -> Optional[Tuple[chess.Board, Tuple]]:
+    """
+    Parse a FEN into (board, cache key), or None if it's invalid.
+    The key is python-chess's transposition key: a tuple of bitboards plus
+    turn, castling and legal ep square. It excludes the move counters and
+    matches FENs that only differ by an uncapturable ep square.
+    """
+    try:
+        board = board_from_fen(fen)
+    except ValueError:
+        logger.warning("Invalid FEN: %s", fen)
+        return None
+    return board, board._transposition_key()
+
+
+def _replay_game(moves_uci: List[str], position_key: Tuple) -> Optional[chess.Board]:
+    """
+    Board reached by playing moves_uci from the starting position, with the
+    moves on its stack, or None if they're illegal or don't reach position_key.
+    Searching it sends "position startpos moves ..." so the engine sees the
+    game history (repetitions, hash entries from earlier moves of the game).
+    """
+    board = chess.Board()
+    try:
+        for move_uci in moves_uci:
+            board.push_uci(move_uci)
+    except ValueError:
+        return None
+    if board._transposition_key() != position_key:
+        return None
+    return board
+
+
+class AnalysisCache:
+    """Small LRU of engine results with hit/miss counters."""
+
+    def __init__(self, maxsize: int = ANALYSIS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return the cached value (refreshing its recency) or None."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Tuple, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class AsyncEngineWrapper:
+    """
+    Pool of asyncio-driven Stockfish processes with Multi-PV support.
+
+    Each request checks out one engine for the duration of a search, so N
+    concurrent requests run on N engines instead of queueing behind one, and
+    the event loop stays free while Stockfish thinks.
+    """
+
+    def __init__(self, stockfish_path: str = "stockfish", pool_size: int = DEFAULT_POOL_SIZE):
+        """Configure the pool; call start() from the event loop to spawn engines."""
         self.stockfish_path = stockfish_path
-        self.engine: Optional[chess.engine.SimpleEngine] = None
-        self._initialize()
-    
-    def _initialize(self):
-        """Start the Stockfish engine process."""
-        try:
-            self.engine = chess.engine.SimpleEngine.popen_uci(self.stockfish_path)
-            # Configure engine options
-            self.engine.configure({
-                "Threads": 2,
-                "Hash": 128,  # MB
-            })
-        except Exception as e:
-            print(f"Warning: Could not initialize Stockfish at {self.stockfish_path}: {e}")
-            self.engine = None
-    
+        self.pool_size = max(1, pool_size)
+        self._engines: List[chess.engine.UciProtocol] = []
+        self._idle: Optional[asyncio.Queue] = None
+        # Repeat positions (theory nodes, retries, page refreshes) skip the search
+        self.analysis_cache = AnalysisCache()
+        self.single_move_cache = AnalysisCache()
+        # analyze_moves' root searches: a depth-d searchmoves line is one ply
+        # shallower than analyze_single_move's depth-d search after the move,
+        # so the two never share entries
+        self.move_list_cache = AnalysisCache()
+        # Searches currently running, so concurrent duplicates share one
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+
+    async def start(self):
+        """Start the Stockfish engine processes."""
+        self._idle = asyncio.Queue()
+        for _ in range(self.pool_size):
+            try:
+                _, engine = await chess.engine.popen_uci(self.stockfish_path)
+                # Configure engine options: one search thread per process so
+                # N engines saturate cores independently
+                await engine.configure({
+                    "Threads": 1,
+                    "Hash": 128,  # MB
+                })
+            except Exception as e:
+                logger.warning("Could not initialize Stockfish at %s: %s", self.stockfish_path, e)
+                break
+            self._engines.append(engine)
+            self._idle.put_nowait(engine)
+
     def is_ready(self) -> bool:
-        """Check if engine is ready."""
-        return self.engine is not None
-    
-    def analyze_position(
+        """Check if at least one engine is ready."""
+        return bool(self._engines)
+
+    @asynccontextmanager
+    async def _checkout(self) -> AsyncIterator[chess.engine.UciProtocol]:
+        """Borrow an idle engine for one search."""
+        engine = await self._idle.get()
+        try:
+            yield engine
+        finally:
+            self._idle.put_nowait(engine)
+
+    async def _single_flight(self, key: Tuple, search: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run search() once per key at a time: concurrent callers with the same
+        key await the same task instead of each occupying an engine.
+        The task is shielded so one caller disconnecting doesn't cancel the
+        search for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(search())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def analyze_position(
         self,
         fen: str,
         depth: int = 18,
-        multipv: int = 5
+        multipv: int = 5,
+        moves_uci: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Analyze a position and return top N moves with evaluations.
-        
+        moves_uci optionally gives the game moves from the starting position
+        that led to fen; the search then runs on the game history instead
+        of the bare FEN (it falls back to the FEN if they don't match).
+
         Returns list of dicts with:
         - move_uci: UCI notation
         - move_san: SAN notation
@@ -52,27 +204,59 @@ class EngineWrapper:
         - rank: 1-indexed ranking
         - pv: Principal variation (list of moves)
         """
-        if not self.engine:
+        if not self.is_ready():
+            return []
+
+        parsed = _parse_position(fen)
+        if parsed is None:
             return []
-        
+        board, position_key = parsed
+
+        # Game history can change the result (repetition and 50-move draw
+        # scores), so searches run on it are cached apart from bare-FEN ones
+        history_key = tuple(moves_uci) if moves_uci else None
+        cache_key = (position_key, depth, multipv, history_key)
+        cached = self.analysis_cache.get(cache_key)
+        if cached is None:
+            cached = await self._single_flight(
+                ("analysis",) + cache_key,
+                lambda: self._search_position(board, depth, multipv, cache_key, moves_uci),
+            )
+        return list(cached)
+
+    async def _search_position(
+        self,
+        board: chess.Board,
+        depth: int,
+        multipv: int,
+        cache_key: Tuple,
+        moves_uci: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the Multi-PV search behind analyze_position and cache the result.
+        The game is only replayed here, on a cache miss, and once per
+        concurrent group of identical requests.
+        """
         try:
-            board = chess.Board(fen)
-            
+            if moves_uci:
+                board = _replay_game(moves_uci, board._transposition_key()) or board
+
             # Run Multi-PV analysis
-            analysis = self.engine.analyse(
-                board,
-                chess.engine.Limit(depth=depth),
-                multipv=multipv
-            )
-            
+            async with self._checkout() as engine:
+                analysis = await engine.analyse(
+                    board,
+                    chess.engine.Limit(depth=depth),
+                    multipv=multipv
+                )
+
             results = []
             for i, info in enumerate(analysis):
                 if "pv" not in info or len(info["pv"]) == 0:
                     continue
-                
+
                 move = info["pv"][0]
                 score = info.get("score")
-                
+
                 # Extract score
                 score_cp = None
                 score_mate = None
@@ -84,7 +268,7 @@ class EngineWrapper:
                         score_cp = 10000 if pov_score.mate() > 0 else -10000
                     else:
                         score_cp = pov_score.score()
-                
+
                 results.append({
                     "move_uci": move.uci(),
                     "move_san": board.san(move),
@@ -94,40 +278,43 @@ class EngineWrapper:
                     "pv": [m.uci() for m in info["pv"][:5]],
                     "depth": info.get("depth", depth)
                 })
-            
+
+            if results:
+                self.analysis_cache.put(cache_key, results)
             return results
-            
-        except Exception as e:
-            print(f"Engine analysis error: {e}")
+
+        except Exception:
+            logger.exception("Engine analysis error")
             return []
-    
-    def get_best_move(self, fen: str, depth: int = 18) -> Optional[str]:
+
+    async def get_best_move(self, fen: str, depth: int = 18) -> Optional[str]:
         """Get the single best move for a position."""
-        analysis = self.analyze_position(fen, depth=depth, multipv=1)
+        analysis = await self.analyze_position(fen, depth=depth, multipv=1)
         if analysis:
             return analysis[0]["move_san"]
         return None
-    
-    def evaluate_move(self, fen: str, move_san: str, depth: int = 18) -> Optional[int]:
+
+    async def evaluate_move(self, fen: str, move_san: str, depth: int = 18) -> Optional[int]:
         """
         Evaluate a specific move by playing it and analyzing the resulting position.
         Returns centipawn evaluation from the original side's perspective.
         """
-        if not self.engine:
+        if not self.is_ready():
             return None
-        
+
         try:
-            board = chess.Board(fen)
+            board = board_from_fen(fen)
             move = board.parse_san(move_san)
             board.push(move)
-            
+
             # Analyze the position after the move
-            analysis = self.engine.analyse(
-                board,
-                chess.engine.Limit(depth=depth),
-                multipv=1
-            )
-            
+            async with self._checkout() as engine:
+                analysis = await engine.analyse(
+                    board,
+                    chess.engine.Limit(depth=depth),
+                    multipv=1
+                )
+
             if analysis and "score" in analysis[0]:
                 score = analysis[0]["score"].relative
                 if score.is_mate():
@@ -135,58 +322,174 @@ class EngineWrapper:
                     return -10000 if score.mate() > 0 else 10000
                 else:
                     return -score.score()  # Negate to get original side's perspective
-            
+
             return None
-            
-        except Exception as e:
-            print(f"Move evaluation error: {e}")
+
+        except Exception:
+            logger.exception("Move evaluation error")
             return None
-    
-    def analyze_single_move(self, fen: str, move_uci: str, depth: int = 12) -> Dict[str, Any]:
+
+    async def analyze_single_move(self, fen: str, move_uci: str, depth: int = 12) -> Dict[str, Any]:
         """
         Analyze a specific move and return its evaluation.
         Used for getting engine eval of history-only moves not in top N.
-        
+
         Returns dict with:
         - score_cp: Centipawn score from side to move perspective
         - score_mate: Mate in N (if applicable)
         """
-        if not self.engine:
+        if not self.is_ready():
             return {"score_cp": -100}  # Default penalty if no engine
-        
+
+        parsed = _parse_position(fen)
+        if parsed is None:
+            return {"score_cp": -100}
+        board, position_key = parsed
+
+        cache_key = (position_key, move_uci, depth)
+        cached = self.single_move_cache.get(cache_key)
+        if cached is None:
+            cached = await self._single_flight(
+                ("single_move",) + cache_key,
+                lambda: self._search_single_move(board, move_uci, depth, cache_key),
+            )
+        return dict(cached)
+
+    async def _search_single_move(
+        self,
+        board: chess.Board,
+        move_uci: str,
+        depth: int,
+        cache_key: Tuple
+    ) -> Dict[str, Any]:
+        """Search the position after one move behind analyze_single_move and cache the result."""
         try:
-            board = chess.Board(fen)
             move = chess.Move.from_uci(move_uci)
-            
+
             if move not in board.legal_moves:
                 return {"score_cp": -100}
-            
+
             board.push(move)
-            
+
             # Analyze the position after the move
-            analysis = self.engine.analyse(
-                board,
-                chess.engine.Limit(depth=depth),
-                multipv=1
-            )
-            
+            async with self._checkout() as engine:
+                analysis = await engine.analyse(
+                    board,
+                    chess.engine.Limit(depth=depth),
+                    multipv=1
+                )
+
             if analysis and "score" in analysis[0]:
                 score = analysis[0]["score"].relative
                 if score.is_mate():
                     # Negate because we're looking from opponent's view
                     mate_score = -10000 if score.mate() > 0 else 10000
-                    return {"score_cp": mate_score, "score_mate": -score.mate()}
+                    result = {"score_cp": mate_score, "score_mate": -score.mate()}
                 else:
-                    return {"score_cp": -score.score()}  # Negate to get original side's perspective
-            
+                    result = {"score_cp": -score.score()}  # Negate to get original side's perspective
+                self.single_move_cache.put(cache_key, result)
+                return result
+
             return {"score_cp": -100}
-            
-        except Exception as e:
-            print(f"Single move analysis error: {e}")
+
+        except Exception:
+            logger.exception("Single move analysis error")
             return {"score_cp": -100}
-    
-    def close(self):
-        """Shut down the engine."""
-        if self.engine:
-            self.engine.quit()
-            self.engine = None
+
+    async def analyze_moves(self, fen: str, moves_uci: List[str], depth: int = 12) -> List[Dict[str, Any]]:
+        """
+        Evaluate several specific moves with one search restricted to them
+        (UCI "go searchmoves", one PV line per move) instead of one
+        analyze_single_move search each.
+
+        Returns one dict per move, in order, shaped like analyze_single_move's
+        (score from the side to move's perspective). Results are cached per
+        move, so moves already evaluated at this depth aren't searched again.
+        """
+        if not moves_uci:
+            return []
+        if not self.is_ready():
+            return [{"score_cp": -100} for _ in moves_uci]  # Default penalty if no engine
+
+        parsed = _parse_position(fen)
+        if parsed is None:
+            return [{"score_cp": -100} for _ in moves_uci]
+        board, position_key = parsed
+
+        results = {}
+        missing = []
+        for move_uci in moves_uci:
+            cached = self.move_list_cache.get((position_key, move_uci, depth))
+            if cached is None:
+                missing.append(move_uci)
+            else:
+                results[move_uci] = cached
+        if missing:
+            results.update(await self._single_flight(
+                ("moves", position_key, tuple(missing), depth),
+                lambda: self._search_moves(board, missing, depth, position_key),
+            ))
+        return [dict(results.get(move_uci, {"score_cp": -100})) for move_uci in moves_uci]
+
+    async def _search_moves(
+        self,
+        board: chess.Board,
+        moves_uci: List[str],
+        depth: int,
+        position_key: Tuple
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run the restricted Multi-PV search behind analyze_moves and cache each move's result."""
+        try:
+            moves = [move for move in map(chess.Move.from_uci, moves_uci) if board.is_legal(move)]
+            if not moves:
+                return {}
+
+            async with self._checkout() as engine:
+                analysis = await engine.analyse(
+                    board,
+                    chess.engine.Limit(depth=depth),
+                    multipv=len(moves),
+                    root_moves=moves
+                )
+
+            results = {}
+            for info in analysis:
+                if "pv" not in info or len(info["pv"]) == 0 or "score" not in info:
+                    continue
+                move_uci = info["pv"][0].uci()
+                score = info["score"].relative  # Already the moving side's perspective
+                if score.is_mate():
+                    result = {"score_cp": 10000 if score.mate() > 0 else -10000, "score_mate": score.mate()}
+                else:
+                    result = {"score_cp": score.score()}
+                self.move_list_cache.put((position_key, move_uci, depth), result)
+                results[move_uci] = result
+            return results
+
+        except Exception:
+            logger.exception("Move list analysis error")
+            return {}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the analysis caches."""
+        return {
+            "analysis": self.analysis_cache.stats(),
+            "single_move": self.single_move_cache.stats(),
+            "move_list": self.move_list_cache.stats(),
+        }
+
+    async def close(self):
+        """Shut down all engines."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        # Cached results belong to this pool's engines/settings; a restarted
+        # pool (possibly a different binary) starts cold
+        self.analysis_cache.clear()
+        self.single_move_cache.clear()
+        self.move_list_cache.clear()
+        engines, self._engines = self._engines, []
+        for engine in engines:
+            try:
+                await engine.quit()
+            except Exception:
+                pass
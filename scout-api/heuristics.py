@@ -4,38 +4,142 @@ Uses python-chess for position analysis without calling the engine.
 """
 
 import chess
+import functools
+import operator
+import os
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Dict, Any, List, Tuple, Optional
 from models import StyleMarkers, MoveAttribution
 
 
+# Max entries per detector cache (theory nodes are re-scored on nearly every request)
+DETECTOR_CACHE_SIZE = 100_000
+
+# Detectors push/pop moves on the caller's board instead of copying it.
+# Set SCOUT_DEBUG_BOARD_CHECKS=1 in dev to assert the board is left untouched.
+DEBUG_BOARD_CHECKS = os.getenv("SCOUT_DEBUG_BOARD_CHECKS") == "1"
+
+# Column order of the (n_moves, 6) attribution matrix (matches MoveAttribution)
+ATTRIBUTION_FIELDS = (
+    "aggression_bonus",
+    "complexity_bonus",
+    "trade_penalty",
+    "greed_bonus",
+    "space_bonus",
+    "tilt_modifier",
+)
+AGGRESSION, COMPLEXITY, TRADE, GREED, SPACE, TILT = range(len(ATTRIBUTION_FIELDS))
+
+# Bits of the ChessHeuristics.move_flags word
+MOVE_CHECK = 1
+MOVE_THREATENS_QUEEN = 2
+MOVE_THREATENS_ROOK = 4
+MOVE_CAPTURE = 8
+CHECK_OR_THREAT_FLAGS = MOVE_CHECK | MOVE_THREATENS_QUEEN | MOVE_THREATENS_ROOK
+FORCING_FLAGS = MOVE_CAPTURE | MOVE_CHECK | MOVE_THREATENS_QUEEN
+
+# Feature bits: which MoveFeatures columns a set of markers can actually use
+FEATURE_CHECK_OR_THREAT = 1
+FEATURE_KING_PRESSURE = 2
+FEATURE_QUEEN_TRADE = 4
+FEATURE_MATERIAL_GRAB = 8
+FEATURE_TENSION = 16
+FEATURE_SPACE = 32
+ALL_FEATURES = 63
+
+# King zone: squares around the king (3x3 grid)
+KING_ZONE_OFFSETS = [
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1),           (0, 1),
+    (1, -1),  (1, 0),  (1, 1),
+]
+
+
+def _compute_king_zone(king_sq: chess.Square) -> Tuple[chess.Square, ...]:
+    """The king square plus its on-board neighbours."""
+    king_file = chess.square_file(king_sq)
+    king_rank = chess.square_rank(king_sq)
+    
+    zone = [king_sq]
+    for df, dr in KING_ZONE_OFFSETS:
+        new_file = king_file + df
+        new_rank = king_rank + dr
+        if 0 <= new_file <= 7 and 0 <= new_rank <= 7:
+            zone.append(chess.square(new_file, new_rank))
+    
+    return tuple(zone)
+
+
+# King-zone geometry only depends on the king square, so tabulate it once
+KING_ZONE_TABLE: List[Tuple[chess.Square, ...]] = [_compute_king_zone(sq) for sq in chess.SQUARES]
+KING_ZONE_BB: List[chess.Bitboard] = [
+    functools.reduce(operator.or_, (chess.BB_SQUARES[sq] for sq in zone))
+    for zone in KING_ZONE_TABLE
+]
+
+
+def _cached_by_position(detector):
+    """
+    Memoize a (board, ...) detector on the board's transposition key.
+    Detector results only depend on the position (pieces, turn, castling, ep),
+    never on the move clocks, so transposed positions share cache entries.
+    Callers scoring many moves on one board can pass position_key to skip
+    recomputing it. Other keyword arguments are passed through and are part
+    of the cache key. Safe to share between worker threads: an entry evicted
+    between move_to_end and the lookup just falls through to a recompute.
+    """
+    cache: "OrderedDict[tuple, Any]" = OrderedDict()
+
+    @functools.wraps(detector)
+    def wrapper(board: chess.Board, *args, position_key: Optional[tuple] = None, **kwargs):
+        key = (position_key or board._transposition_key(), args)
+        if kwargs:
+            key += (tuple(sorted(kwargs.items())),)
+        try:
+            cache.move_to_end(key)
+            return cache[key]
+        except KeyError:
+            pass
+
+        result = detector(board, *args, **kwargs)
+        cache[key] = result
+        if len(cache) > DETECTOR_CACHE_SIZE:
+            cache.popitem(last=False)
+        return result
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+
+@dataclass
+class MoveFeatures:
+    """
+    Style features for a batch of moves on one board, stored column-wise
+    (one array per feature, one slot per move) so scoring is vectorised.
+    """
+    moves: List[chess.Move]
+    check_or_threat: np.ndarray  # bool
+    king_pressure_delta: np.ndarray  # int
+    queen_trade: np.ndarray  # bool
+    material_grab: np.ndarray  # bool
+    tension_delta: np.ndarray  # int
+    space_expansion: np.ndarray  # bool
+
+
 class ChessHeuristics:
     """Heuristic feature detectors for style-based move scoring."""
     
-    # King zone: squares around the king (3x3 grid)
-    KING_ZONE_OFFSETS = [
-        (-1, -1), (-1, 0), (-1, 1),
-        (0, -1),           (0, 1),
-        (1, -1),  (1, 0),  (1, 1),
-    ]
+    KING_ZONE_OFFSETS = KING_ZONE_OFFSETS
     
     @staticmethod
-    def get_king_zone(board: chess.Board, color: chess.Color) -> List[chess.Square]:
+    def get_king_zone(board: chess.Board, color: chess.Color) -> Tuple[chess.Square, ...]:
         """Get the 3x3 zone around the king of the given color."""
         king_sq = board.king(color)
         if king_sq is None:
-            return []
-        
-        king_file = chess.square_file(king_sq)
-        king_rank = chess.square_rank(king_sq)
-        
-        zone = [king_sq]
-        for df, dr in ChessHeuristics.KING_ZONE_OFFSETS:
-            new_file = king_file + df
-            new_rank = king_rank + dr
-            if 0 <= new_file <= 7 and 0 <= new_rank <= 7:
-                zone.append(chess.square(new_file, new_rank))
-        
-        return zone
+            return ()
+        return KING_ZONE_TABLE[king_sq]
     
     @staticmethod
     def count_king_zone_pressure(board: chess.Board, attacking_color: chess.Color) -> int:
@@ -43,17 +147,21 @@ class ChessHeuristics:
         Count the number of pieces attacking the enemy king zone.
         Higher = more pressure on the king.
         """
-        enemy_color = not attacking_color
-        king_zone = ChessHeuristics.get_king_zone(board, enemy_color)
+        king_sq = board.king(not attacking_color)
+        if king_sq is None:
+            return 0
         
+        # Each (attacker, zone square) pair counts once: AND every attacker's
+        # attack bitboard with the zone bitboard and popcount the overlap
+        zone_bb = KING_ZONE_BB[king_sq]
         pressure = 0
-        for sq in king_zone:
-            attackers = board.attackers(attacking_color, sq)
-            pressure += len(attackers)
+        for sq in chess.scan_forward(board.occupied_co[attacking_color]):
+            pressure += (board.attacks_mask(sq) & zone_bb).bit_count()
         
         return pressure
     
     @staticmethod
+    @_cached_by_position
     def move_increases_king_pressure(board: chess.Board, move: chess.Move) -> bool:
         """Check if a move increases pressure on the enemy king zone."""
         color = board.color_at(move.from_square)
@@ -63,20 +171,23 @@ class ChessHeuristics:
         # Measure pressure before
         pressure_before = ChessHeuristics.count_king_zone_pressure(board, color)
         
-        # Make the move
-        board_copy = board.copy()
-        board_copy.push(move)
-        
-        # Measure pressure after
-        pressure_after = ChessHeuristics.count_king_zone_pressure(board_copy, color)
+        # Make the move (push/pop in place instead of copying the board)
+        board.push(move)
+        try:
+            pressure_after = ChessHeuristics.count_king_zone_pressure(board, color)
+        finally:
+            board.pop()
         
         return pressure_after > pressure_before
     
     @staticmethod
+    @_cached_by_position
     def calculate_board_tension(board: chess.Board) -> int:
         """
         Calculate board tension: sum of legal captures + checks available.
         Higher tension = more tactical complexity.
+        Cached per position: every candidate's "before" is the same board, and
+        sibling candidates often transpose into the same "after" positions.
         """
         tension = 0
         
@@ -84,15 +195,14 @@ class ChessHeuristics:
             # Count captures
             if board.is_capture(move):
                 tension += 1
-            # Count checks
-            board_copy = board.copy()
-            board_copy.push(move)
-            if board_copy.is_check():
+            # Count checks (tested on the current board, no push/pop)
+            if board.gives_check(move):
                 tension += 1
         
         return tension
     
     @staticmethod
+    @_cached_by_position
     def move_increases_tension(board: chess.Board, move: chess.Move) -> Tuple[bool, int]:
         """
         Check if a move increases board tension.
@@ -100,15 +210,17 @@ class ChessHeuristics:
         """
         tension_before = ChessHeuristics.calculate_board_tension(board)
         
-        board_copy = board.copy()
-        board_copy.push(move)
-        
-        tension_after = ChessHeuristics.calculate_board_tension(board_copy)
+        board.push(move)
+        try:
+            tension_after = ChessHeuristics.calculate_board_tension(board)
+        finally:
+            board.pop()
         delta = tension_after - tension_before
         
         return delta > 0, delta
     
     @staticmethod
+    @_cached_by_position
     def is_queen_trade_offer(board: chess.Board, move: chess.Move) -> bool:
         """
         Check if a move offers or forces a queen exchange.
@@ -123,20 +235,26 @@ class ChessHeuristics:
             return True
         
         # Check if after this move, our queen can be captured by their queen
-        board_copy = board.copy()
         moving_piece = board.piece_at(move.from_square)
-        board_copy.push(move)
         
         # If we moved our queen, check if it's attacked by their queen
         if moving_piece and moving_piece.piece_type == chess.QUEEN:
-            enemy_color = not moving_piece.color
-            for sq in board_copy.pieces(chess.QUEEN, enemy_color):
-                if move.to_square in board_copy.attacks(sq):
-                    return True
+            return ChessHeuristics._queen_faces_queen(board, move, not moving_piece.color)
         
         return False
     
     @staticmethod
+    def _queen_faces_queen(board: chess.Board, move: chess.Move, enemy_color: chess.Color) -> bool:
+        """
+        True if, after our queen makes `move`, an enemy queen attacks its landing
+        square. One bitboard AND on the pre-move board: enemy attackers of the
+        square with the from-square vacated, masked to queens.
+        """
+        occupied_after = board.occupied & ~chess.BB_SQUARES[move.from_square]
+        return bool(board.attackers_mask(enemy_color, move.to_square, occupied_after) & board.queens)
+    
+    @staticmethod
+    @_cached_by_position
     def is_material_grab(board: chess.Board, move: chess.Move, eval_drop_threshold: float = 1.5) -> bool:
         """
         Check if a move is a "greedy" material grab.
@@ -155,124 +273,299 @@ class ChessHeuristics:
             return False
         
         # Check if capturing piece will be undefended
-        board_copy = board.copy()
-        board_copy.push(move)
-        
-        # Check if the square is attacked by opponent
-        enemy_color = not moving_piece.color
-        if board_copy.is_attacked_by(enemy_color, move.to_square):
-            # Check if we have enough defenders
-            defenders = board_copy.attackers(moving_piece.color, move.to_square)
-            attackers = board_copy.attackers(enemy_color, move.to_square)
-            if len(attackers) > len(defenders):
-                return True
-        
-        return False
+        return ChessHeuristics._capture_is_outnumbered(board, move, moving_piece.color)
+    
+    @staticmethod
+    def _capture_is_outnumbered(board: chess.Board, move: chess.Move, color: chess.Color) -> bool:
+        """
+        True if, after the capture `move`, the enemy attacks the landing square
+        with more pieces than we defend it.
+        Read off the pre-move board without pushing: the landing square is
+        already occupied, so the post-move occupancy is just the current one
+        with the from-square vacated (which can uncover sliders on either
+        side), and the mover itself drops out of our defenders.
+        """
+        from_bb = chess.BB_SQUARES[move.from_square]
+        occupied_after = board.occupied & ~from_bb
+        attackers = board.attackers_mask(not color, move.to_square, occupied_after)
+        defenders = board.attackers_mask(color, move.to_square, occupied_after) & ~from_bb
+        # Popcount the raw attacker bitboards (no SquareSet allocation)
+        return attackers.bit_count() > defenders.bit_count()
     
     @staticmethod
+    @_cached_by_position
     def is_space_expansion(board: chess.Board, move: chess.Move) -> bool:
         """
         Check if a move is a space-gaining pawn push.
         True for non-capture pawn moves that advance past the 4th rank.
         """
-        moving_piece = board.piece_at(move.from_square)
+        return ChessHeuristics._is_space_push(
+            board.piece_at(move.from_square), move.to_square, board.is_capture(move)
+        )
+    
+    @staticmethod
+    def _is_space_push(moving_piece: Optional[chess.Piece], to_square: chess.Square, is_capture: bool) -> bool:
+        """Space-push test on pre-move facts (shared by the single and batch paths)."""
         if not moving_piece or moving_piece.piece_type != chess.PAWN:
             return False
         
-        if board.is_capture(move):
+        if is_capture:
             return False
         
         # Check if pawn is advancing to 5th rank or beyond (for white)
-        to_rank = chess.square_rank(move.to_square)
+        to_rank = chess.square_rank(to_square)
         if moving_piece.color == chess.WHITE:
             return to_rank >= 4  # 5th rank = index 4
         else:
             return to_rank <= 3  # 4th rank from black's perspective
     
+    @staticmethod
+    @_cached_by_position
+    def move_flags(board: chess.Board, move: chess.Move) -> int:
+        """
+        Tactical facts about a move as a bitfield:
+        MOVE_CHECK, MOVE_THREATENS_QUEEN, MOVE_THREATENS_ROOK, MOVE_CAPTURE.
+        Capture and check are read off the current board; only the threat
+        bits need the move pushed (once).
+        """
+        flags = 0
+        if board.is_capture(move):
+            flags |= MOVE_CAPTURE
+        if board.gives_check(move):
+            flags |= MOVE_CHECK
+        if board.piece_type_at(move.from_square) is not None:
+            board.push(move)
+            try:
+                flags |= ChessHeuristics._threat_flags_after_push(board, move.to_square)
+            finally:
+                board.pop()
+        return flags
+    
+    @staticmethod
+    def _threat_flags_after_push(board: chess.Board, to_square: chess.Square) -> int:
+        """Threat bits for the piece that just landed on `to_square`."""
+        # After the push it's the enemy's turn; AND the mover's attack mask
+        # with the enemy's queens and rooks
+        targets = board.attacks_mask(to_square) & board.occupied_co[board.turn]
+        flags = 0
+        if targets & board.queens:
+            flags |= MOVE_THREATENS_QUEEN
+        if targets & board.rooks:
+            flags |= MOVE_THREATENS_ROOK
+        return flags
+    
     @staticmethod
     def is_check_or_threat(board: chess.Board, move: chess.Move) -> bool:
-        """Check if a move gives check or creates a direct threat."""
-        board_copy = board.copy()
-        board_copy.push(move)
-        
-        # Check for check
-        if board_copy.is_check():
-            return True
-        
-        # Check for threats to high-value pieces (queen, rook)
+        """Check if a move gives check or creates a direct threat (to a queen or rook)."""
+        return bool(ChessHeuristics.move_flags(board, move) & CHECK_OR_THREAT_FLAGS)
+    
+    @staticmethod
+    def needed_features(markers: StyleMarkers) -> int:
+        """
+        FEATURE_* bits for the detectors whose marker gate is open.
+        Gates are fixed per request, so this is computed once per prediction;
+        neutral markers need no detector work at all.
+        """
+        needed = 0
+        if markers.aggression_index > 75:
+            needed |= FEATURE_CHECK_OR_THREAT | FEATURE_KING_PRESSURE
+        if markers.queen_trade_avoidance > 80:
+            needed |= FEATURE_QUEEN_TRADE
+        if markers.material_greed > 70:
+            needed |= FEATURE_MATERIAL_GRAB
+        if markers.complexity_preference > 80 or markers.complexity_preference < 30:
+            needed |= FEATURE_TENSION
+        if markers.space_expansion > 60:
+            needed |= FEATURE_SPACE
+        return needed
+    
+    @staticmethod
+    @_cached_by_position
+    def _move_feature_row(
+        board: chess.Board,
+        move: chess.Move,
+        needed: int = ALL_FEATURES
+    ) -> Tuple[bool, int, bool, bool, int, bool]:
+        """
+        Compute the `needed` style features of one move with at most one push/pop.
+        Returns (check_or_threat, king_pressure_after, queen_trade,
+        material_grab, tension_after, space_expansion); the "after" counts
+        are turned into deltas by the caller, which measures "before" once.
+        Features outside `needed` are returned as False/0.
+        """
         moving_piece = board.piece_at(move.from_square)
-        if moving_piece:
-            enemy_color = not moving_piece.color
-            attacks = board_copy.attacks(move.to_square)
-            for sq in attacks:
-                target = board_copy.piece_at(sq)
-                if target and target.color == enemy_color:
-                    if target.piece_type in [chess.QUEEN, chess.ROOK]:
-                        return True
+        captured = board.piece_at(move.to_square)
+        is_capture = board.is_capture(move)
+        color = moving_piece.color if moving_piece else board.turn
+        enemy_color = not color
         
-        return False
+        space = bool(needed & FEATURE_SPACE) and ChessHeuristics._is_space_push(
+            moving_piece, move.to_square, is_capture
+        )
+        queen_trade = False
+        if needed & FEATURE_QUEEN_TRADE:
+            if captured and captured.piece_type == chess.QUEEN:
+                queen_trade = True
+            elif moving_piece and moving_piece.piece_type == chess.QUEEN:
+                queen_trade = ChessHeuristics._queen_faces_queen(board, move, enemy_color)
+        check_or_threat = bool(needed & FEATURE_CHECK_OR_THREAT) and board.gives_check(move)
+        pressure_after = 0
+        material_grab = False
+        tension_after = 0
+        
+        if needed & FEATURE_MATERIAL_GRAB and is_capture and captured and moving_piece:
+            material_grab = ChessHeuristics._capture_is_outnumbered(board, move, color)
+        
+        # Space, material grabs and queen trades are read off the board before the move
+        if not needed & ~(FEATURE_SPACE | FEATURE_MATERIAL_GRAB | FEATURE_QUEEN_TRADE):
+            return check_or_threat, pressure_after, queen_trade, material_grab, tension_after, space
+        
+        board.push(move)
+        try:
+            if needed & FEATURE_CHECK_OR_THREAT and not check_or_threat and moving_piece:
+                check_or_threat = bool(ChessHeuristics._threat_flags_after_push(board, move.to_square))
+            if needed & FEATURE_KING_PRESSURE:
+                pressure_after = ChessHeuristics.count_king_zone_pressure(board, color)
+            if needed & FEATURE_TENSION:
+                tension_after = ChessHeuristics.calculate_board_tension(board)
+        finally:
+            board.pop()
+        
+        return check_or_threat, pressure_after, queen_trade, material_grab, tension_after, space
     
     @staticmethod
-    def calculate_style_fit(
+    def extract_move_features(
         board: chess.Board,
-        move: chess.Move,
+        moves: List[chess.Move],
+        needed: int = ALL_FEATURES
+    ) -> MoveFeatures:
+        """
+        Extract style features for all moves in one pass over the list.
+        Board-level "before" values (tension, king pressure) are measured once
+        instead of once per move per detector. Only the FEATURE_* columns in
+        `needed` are filled; the rest stay zero.
+        """
+        n = len(moves)
+        features = MoveFeatures(
+            moves=list(moves),
+            check_or_threat=np.zeros(n, dtype=bool),
+            king_pressure_delta=np.zeros(n, dtype=np.int32),
+            queen_trade=np.zeros(n, dtype=bool),
+            material_grab=np.zeros(n, dtype=bool),
+            tension_delta=np.zeros(n, dtype=np.int32),
+            space_expansion=np.zeros(n, dtype=bool),
+        )
+        if n == 0 or not needed:
+            return features
+        
+        key = board._transposition_key()
+        tension_before = (
+            ChessHeuristics.calculate_board_tension(board, position_key=key) if needed & FEATURE_TENSION else 0
+        )
+        pressure_before: Dict[chess.Color, int] = {}
+        
+        for i, move in enumerate(moves):
+            check_or_threat, pressure_after, queen_trade, material_grab, tension_after, space = (
+                ChessHeuristics._move_feature_row(board, move, needed, position_key=key)
+            )
+            color = board.color_at(move.from_square)
+            if needed & FEATURE_KING_PRESSURE and color is not None:
+                if color not in pressure_before:
+                    pressure_before[color] = ChessHeuristics.count_king_zone_pressure(board, color)
+                features.king_pressure_delta[i] = pressure_after - pressure_before[color]
+            features.check_or_threat[i] = check_or_threat
+            features.queen_trade[i] = queen_trade
+            features.material_grab[i] = material_grab
+            features.tension_delta[i] = tension_after - tension_before
+            features.space_expansion[i] = space
+        
+        return features
+    
+    @staticmethod
+    def score_move_features(
+        features: MoveFeatures,
         markers: StyleMarkers
-    ) -> Tuple[float, MoveAttribution]:
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate the style fit score for a move based on opponent's markers.
-        Returns (score, attribution breakdown).
+        Apply the marker-gated style bonuses to a feature batch.
+        Marker gates are scalars per request, so each one either fills a whole
+        attribution column or leaves it at zero.
+        Returns (scores, attribution matrix with ATTRIBUTION_FIELDS columns).
         """
-        attribution = MoveAttribution()
-        total_bonus = 0.0
+        attribution = np.zeros((len(features.moves), len(ATTRIBUTION_FIELDS)))
         
         # Aggression Index
         if markers.aggression_index > 75:
-            if ChessHeuristics.is_check_or_threat(board, move):
-                bonus = 0.20
-                attribution.aggression_bonus = bonus
-                total_bonus += bonus
-            if ChessHeuristics.move_increases_king_pressure(board, move):
-                bonus = 0.15
-                attribution.aggression_bonus += bonus
-                total_bonus += bonus
+            attribution[:, AGGRESSION] = 0.20 * features.check_or_threat + 0.15 * (features.king_pressure_delta > 0)
         
         # Queen Trade Avoidance
         if markers.queen_trade_avoidance > 80:
-            if ChessHeuristics.is_queen_trade_offer(board, move):
-                penalty = -0.50
-                attribution.trade_penalty = penalty
-                total_bonus += penalty
+            attribution[:, TRADE] = np.where(features.queen_trade, -0.50, 0.0)
         
         # Material Greed
         if markers.material_greed > 70:
-            if ChessHeuristics.is_material_grab(board, move):
-                bonus = 0.30
-                attribution.greed_bonus = bonus
-                total_bonus += bonus
+            attribution[:, GREED] = np.where(features.material_grab, 0.30, 0.0)
         
         # Complexity Preference
         if markers.complexity_preference > 80:
-            increases, delta = ChessHeuristics.move_increases_tension(board, move)
-            if increases and delta > 2:
-                bonus = 0.25
-                attribution.complexity_bonus = bonus
-                total_bonus += bonus
+            attribution[:, COMPLEXITY] = np.where(features.tension_delta > 2, 0.25, 0.0)
         elif markers.complexity_preference < 30:
             # Penalize complex moves for simple players
-            increases, delta = ChessHeuristics.move_increases_tension(board, move)
-            if increases and delta > 3:
-                penalty = -0.15
-                attribution.complexity_bonus = penalty
-                total_bonus += penalty
+            attribution[:, COMPLEXITY] = np.where(features.tension_delta > 3, -0.15, 0.0)
         
         # Space Expansion
         if markers.space_expansion > 60:
-            if ChessHeuristics.is_space_expansion(board, move):
-                bonus = 0.15
-                attribution.space_bonus = bonus
-                total_bonus += bonus
+            attribution[:, SPACE] = np.where(features.space_expansion, 0.15, 0.0)
+        
+        # Summed in marker order (not column order) to keep scores bit-identical
+        scores = (
+            attribution[:, AGGRESSION] + attribution[:, TRADE] + attribution[:, GREED]
+            + attribution[:, COMPLEXITY] + attribution[:, SPACE]
+        )
+        return scores, attribution
+    
+    @staticmethod
+    def to_attribution(row: np.ndarray) -> MoveAttribution:
+        """Build a MoveAttribution from one row of the attribution matrix."""
+        return MoveAttribution(**dict(zip(ATTRIBUTION_FIELDS, row.tolist())))
+    
+    @staticmethod
+    def calculate_style_fits(
+        board: chess.Board,
+        moves: List[chess.Move],
+        markers: StyleMarkers
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate style fit scores for a batch of moves on the same board.
+        Returns (scores aligned with `moves`, (n, 6) attribution matrix).
+        """
+        needed = ChessHeuristics.needed_features(markers)
+        if not needed:
+            # No gate open: every bonus is zero, skip features and scoring
+            return np.zeros(len(moves)), np.zeros((len(moves), len(ATTRIBUTION_FIELDS)))
+        
+        if DEBUG_BOARD_CHECKS:
+            fen_before = board.fen()
         
-        return total_bonus, attribution
+        features = ChessHeuristics.extract_move_features(board, moves, needed)
+        
+        if DEBUG_BOARD_CHECKS:
+            assert board.fen() == fen_before, "style detectors left the board mutated"
+        
+        return ChessHeuristics.score_move_features(features, markers)
+    
+    @staticmethod
+    def calculate_style_fit(
+        board: chess.Board,
+        move: chess.Move,
+        markers: StyleMarkers
+    ) -> Tuple[float, MoveAttribution]:
+        """
+        Calculate the style fit score for a move based on opponent's markers.
+        Returns (score, attribution breakdown).
+        """
+        scores, attribution = ChessHeuristics.calculate_style_fits(board, [move], markers)
+        return float(scores[0]), ChessHeuristics.to_attribution(attribution[0])
     
     @staticmethod
     def detect_tilt(recent_eval_deltas: List[float], threshold: float = 1.0) -> bool:
@@ -319,24 +612,4 @@ class ChessHeuristics:
         Check if a move is "forcing" - a check, capture, or immediate queen threat.
         Used by the Tactical Guardrail to detect tactically critical moves.
         """
-        # Check if it's a capture
-        if board.is_capture(move):
-            return True
-        
-        # Check if it gives check
-        board_copy = board.copy()
-        board_copy.push(move)
-        if board_copy.is_check():
-            return True
-        
-        # Check if it creates a direct threat to the queen
-        moving_piece = board.piece_at(move.from_square)
-        if moving_piece:
-            enemy_color = not moving_piece.color
-            attacks = board_copy.attacks(move.to_square)
-            for sq in attacks:
-                target = board_copy.piece_at(sq)
-                if target and target.color == enemy_color and target.piece_type == chess.QUEEN:
-                    return True
-        
-        return False
+        return bool(ChessHeuristics.move_flags(board, move) & FORCING_FLAGS)
@@ -5,19 +5,38 @@ FastAPI microservice for chess move prediction using hybrid analysis.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi.responses import JSONResponse
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import logging
+import logging.handlers
 import os
+import queue
+import chess
+import numpy as np
+import orjson
 from dotenv import load_dotenv
 
 from predictor import ScoutPredictor
-from models import PredictionRequest, PredictionResponse, PredictionMode, StyleMarkers
-from heuristics import ChessHeuristics
+from engine import DEFAULT_POOL_SIZE, board_from_fen
+from models import PredictionRequest, PredictionResponse, PredictionMode, StyleMarkers, AnalyzeMovesRequest
+from heuristics import ChessHeuristics, ATTRIBUTION_FIELDS, AGGRESSION, TRADE, GREED, COMPLEXITY, SPACE
 # from database import db, get_db  # Disabled for now
 
 load_dotenv()
 
+logger = logging.getLogger("scout.api")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded by orjson (C encoder, handles numpy values natively)."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
 app = FastAPI(
+    default_response_class=ORJSONResponse,
     title="Scout API",
     description="Style-Weighted Move Prediction Engine for Chess Scout",
     version="1.0.0"
@@ -34,28 +53,68 @@ app.add_middleware(
 # Global predictor instance
 predictor: Optional[ScoutPredictor] = None
 
+# Background thread that writes "scout.*" log records to stderr
+log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Route the "scout" loggers through a queue so request handlers only
+    enqueue records; the listener thread does the actual stderr I/O.
+    """
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    scout_logger = logging.getLogger("scout")
+    scout_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    scout_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    scout_logger.propagate = False
+    
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the predictor with Stockfish on startup."""
-    global predictor
+    global predictor, log_listener
+    log_listener = configure_logging()
     stockfish_path = os.getenv("STOCKFISH_PATH", "stockfish")
-    predictor = ScoutPredictor(stockfish_path=stockfish_path)
-    print(f"Scout API initialized with Stockfish at: {stockfish_path}")
+    pool_size = int(os.getenv("ENGINE_POOL_SIZE", DEFAULT_POOL_SIZE))
+    # Optional fixed seed for reproducible move sampling (replays, A/B runs)
+    seed = os.getenv("SCOUT_SEED")
+    predictor = ScoutPredictor(
+        stockfish_path=stockfish_path,
+        engine_pool_size=pool_size,
+        seed=int(seed) if seed else None,
+        # SCOUT_TRACE=0 drops the logic trace log for clients that don't show it
+        trace_enabled=os.getenv("SCOUT_TRACE", "1") != "0"
+    )
+    await predictor.start()
+    logger.info("Scout API initialized with %d Stockfish engine(s) at: %s", pool_size, stockfish_path)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown."""
-    global predictor
+    global predictor, log_listener
     if predictor:
-        predictor.close()
+        await predictor.close()
+    if log_listener:
+        log_listener.stop()
+        log_listener = None
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "engine_ready": predictor is not None}
+    return {
+        "status": "healthy",
+        "engine_ready": predictor is not None,
+        "engine_cache": predictor.engine.cache_stats() if predictor else None,
+    }
 
 
 @app.post("/predict", response_model=PredictionResponse)
@@ -71,7 +130,7 @@ async def predict_move(request: PredictionRequest) -> PredictionResponse:
         raise HTTPException(status_code=503, detail="Predictor not initialized")
     
     try:
-        result = predictor.predict(
+        result = await predictor.predict(
             fen=request.fen,
             mode=request.mode,
             opponent_username=request.opponent_username,
@@ -79,7 +138,8 @@ async def predict_move(request: PredictionRequest) -> PredictionResponse:
             style_markers=request.style_markers,
             history_moves=request.history_moves,
             recent_eval_deltas=request.recent_eval_deltas,
-            move_number=request.move_number
+            move_number=request.move_number,
+            moves_uci=request.moves_uci
         )
         return result
     except Exception as e:
@@ -96,7 +156,7 @@ async def analyze_position(fen: str, depth: int = 18, multipv: int = 5):
         raise HTTPException(status_code=503, detail="Predictor not initialized")
     
     try:
-        analysis = predictor.engine.analyze_position(fen, depth=depth, multipv=multipv)
+        analysis = await predictor.engine.analyze_position(fen, depth=depth, multipv=multipv)
         return {"fen": fen, "analysis": analysis}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -123,8 +183,76 @@ async def analyze_position(fen: str, depth: int = 18, multipv: int = 5):
 #     return {"moves": history}
 
 
+# /analyze_moves impact badges, one per attribution column (trade is the only penalty)
+BADGE_COLUMNS = [AGGRESSION, TRADE, GREED, COMPLEXITY, SPACE]
+BADGE_TYPES = ("aggression", "trade", "greed", "complexity", "space")
+BADGE_COLORS = ("red", "orange", "yellow", "purple", "blue")
+BADGE_SIGNS = np.array([1, -1, 1, 1, 1])
+
+
+def _style_badges(attribution_matrix: np.ndarray) -> List[List[Dict[str, str]]]:
+    """
+    Impact badges for every move at once: badges fire where a bonus column is
+    positive (or the trade penalty negative), labelled with the truncated percent.
+    """
+    values = attribution_matrix[:, BADGE_COLUMNS]
+    pcts = (values * 100).astype(np.int32).tolist()
+    badges: List[List[Dict[str, str]]] = [[] for _ in range(len(values))]
+    rows, cols = np.nonzero(values * BADGE_SIGNS > 0)
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        pct = pcts[i][j]
+        badges[i].append({
+            "type": BADGE_TYPES[j],
+            "value": f"+{pct}%" if BADGE_SIGNS[j] > 0 else f"{pct}%",
+            "color": BADGE_COLORS[j],
+        })
+    return badges
+
+
+def _style_rows(
+    board: chess.Board,
+    moves: List[chess.Move],
+    markers: StyleMarkers
+) -> List[Optional[Tuple[float, Dict[str, float], List[Dict[str, str]]]]]:
+    """
+    (style_fit, attribution, badges) per move, scored in one batch. If the
+    batch fails, each move is scored on its own, so a bad move only loses
+    its own style data (None).
+    """
+    try:
+        style_fits, attribution_matrix = ChessHeuristics.calculate_style_fits(board, moves, markers)
+    except Exception:
+        if len(moves) <= 1:
+            logger.exception("Style scoring failed for %s", moves[0].uci() if moves else "no moves")
+            return [None] * len(moves)
+        logger.warning("Batch style scoring failed; scoring %d moves one at a time", len(moves))
+        return [row for move in moves for row in _style_rows(board, [move], markers)]
+    
+    # Plain dicts serialize straight through, no model round-trip
+    attributions = [dict(zip(ATTRIBUTION_FIELDS, row)) for row in attribution_matrix.tolist()]
+    return list(zip(style_fits.tolist(), attributions, _style_badges(attribution_matrix)))
+
+
+async def _engine_eval_after_move(temp_board: chess.Board) -> float:
+    """Engine evaluation (pawns) of the position after a move; 0 if unavailable."""
+    engine_eval = 0
+    try:
+        # Analyze the position after the move directly
+        analysis = await predictor.engine.analyze_position(temp_board.fen(), depth=15, multipv=1)
+        if analysis and len(analysis) > 0:
+            # Convert from side-to-move POV to White POV
+            score_cp = analysis[0]["score_cp"]
+            engine_eval = score_cp / 100
+            # Convert to White POV based on whose turn it is after the move
+            if temp_board.turn == "b":
+                engine_eval = -engine_eval
+    except:
+        engine_eval = 0
+    return engine_eval
+
+
 @app.post("/analyze_moves")
-async def analyze_moves_with_style(request: dict):
+async def analyze_moves_with_style(request: AnalyzeMovesRequest):
     """
     Analyze a list of moves with style-adjusted evaluations.
     Returns engine evals + style impact for each move.
@@ -133,66 +261,50 @@ async def analyze_moves_with_style(request: dict):
         raise HTTPException(status_code=503, detail="Predictor not initialized")
     
     try:
-        fen = request["fen"]
-        moves = request["moves"]  # List of UCI moves
-        style_markers = request.get("style_markers", {})
-        opponent_username = request.get("opponent_username", "unknown")
-        
-        # Convert to StyleMarkers object
-        from models import StyleMarkers
-        markers = StyleMarkers(**style_markers)
+        fen = request.fen
+        moves = request.moves  # List of UCI moves
+        markers = request.style_markers  # Validated by FastAPI with the body
         
         # We'll evaluate each move individually to match frontend behavior
         
         results = []
-        import chess
-        board = chess.Board(fen)
+        board = board_from_fen(fen)
+        # Generate legal moves once and look requested moves up by UCI string;
+        # parse_uci is only the fallback so invalid input errors as before
+        uci_map = {m.uci(): m for m in board.legal_moves}
         
+        played = []
         for move_uci in moves:
             # Evaluate the position after the move (like frontend does)
+            move = uci_map.get(move_uci) or board.parse_uci(move_uci)
             temp_board = board.copy()
-            move = temp_board.parse_uci(move_uci)
             temp_board.push(move)
-            
-            # Get engine evaluation of the new position
-            engine_eval = 0
-            try:
-                # Analyze the position after the move directly
-                analysis = predictor.engine.analyze_position(temp_board.fen(), depth=15, multipv=1)
-                if analysis and len(analysis) > 0:
-                    # Convert from side-to-move POV to White POV
-                    score_cp = analysis[0]["score_cp"]
-                    engine_eval = score_cp / 100
-                    # Convert to White POV based on whose turn it is after the move
-                    if temp_board.turn == "b":
-                        engine_eval = -engine_eval
-            except:
-                engine_eval = 0
-            
-            # Calculate style impact
-            try:
-                move = board.parse_uci(move_uci)
-                style_fit, attribution = ChessHeuristics.calculate_style_fit(board, move, markers)
+            played.append((move_uci, move, temp_board))
+        
+        # Search all resulting positions concurrently: each search checks out
+        # its own engine from the pool, so N moves take ~N/pool_size searches
+        engine_evals = await asyncio.gather(*(
+            _engine_eval_after_move(temp_board) for _, _, temp_board in played
+        ))
+        
+        # Calculate style impact for all moves in one batch
+        # Style detectors are CPU-bound; keep them off the event loop
+        # (neutral markers need no detectors, so don't pay for the thread hop)
+        played_moves = [move for _, move, _ in played]
+        if ChessHeuristics.needed_features(markers):
+            style_rows = await asyncio.to_thread(_style_rows, board, played_moves, markers)
+        else:
+            style_rows = _style_rows(board, played_moves, markers)
+        
+        for (move_uci, move, temp_board), engine_eval, style_row in zip(played, engine_evals, style_rows):
+            if style_row is not None:
+                style_fit, attribution, badges = style_row
                 
                 # Calculate style-adjusted evaluation
                 # Positive style_fit = good for this player's style, so boost the eval
                 style_adjustment = style_fit * 2  # Scale factor for visibility
                 adjusted_eval = engine_eval + style_adjustment
-                
-                # Determine impact badges
-                badges = []
-                if attribution.aggression_bonus > 0:
-                    badges.append({"type": "aggression", "value": "+" + str(int(attribution.aggression_bonus * 100)) + "%", "color": "red"})
-                if attribution.trade_penalty < 0:
-                    badges.append({"type": "trade", "value": str(int(attribution.trade_penalty * 100)) + "%", "color": "orange"})
-                if attribution.greed_bonus > 0:
-                    badges.append({"type": "greed", "value": "+" + str(int(attribution.greed_bonus * 100)) + "%", "color": "yellow"})
-                if attribution.complexity_bonus > 0:
-                    badges.append({"type": "complexity", "value": "+" + str(int(attribution.complexity_bonus * 100)) + "%", "color": "purple"})
-                if attribution.space_bonus > 0:
-                    badges.append({"type": "space", "value": "+" + str(int(attribution.space_bonus * 100)) + "%", "color": "blue"})
-                
-            except:
+            else:
                 style_fit = 0
                 attribution = {"aggression_bonus": 0, "complexity_bonus": 0, "trade_penalty": 0, "greed_bonus": 0, "space_bonus": 0, "tilt_modifier": 0}
                 style_adjustment = 0
@@ -2,8 +2,10 @@
 Pydantic models for Scout API request/response schemas.
 """
 
+import dataclasses
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic.dataclasses import dataclass
+from typing import Annotated, Optional, List, Dict, Any
 from enum import Enum
 
 
@@ -42,33 +44,49 @@ class PredictionRequest(BaseModel):
     history_moves: List[HistoryMove] = Field(default_factory=list, description="Historical moves at this position")
     recent_eval_deltas: List[float] = Field(default_factory=list, description="Eval changes of last 3 moves (for tilt detection)")
     move_number: int = Field(default=1, ge=1, description="Current move number (for phase detection)")
+    moves_uci: List[str] = Field(default_factory=list, description="Game moves from the starting position in UCI, if known (lets the engine reuse its hash across a game)")
 
 
-class MoveAttribution(BaseModel):
+class AnalyzeMovesRequest(BaseModel):
+    """Request body for style-adjusted analysis of a list of moves."""
+    fen: str = Field(description="Current board position in FEN notation")
+    moves: List[str] = Field(description="Moves to analyze, in UCI notation")
+    style_markers: StyleMarkers = Field(default_factory=StyleMarkers, description="Opponent style profile")
+    opponent_username: str = Field(default="unknown", description="Opponent username for context")
+
+
+# MoveAttribution and CandidateMove are built by the predictor several times
+# per request from values it computed itself, so they are plain (unvalidated)
+# dataclasses; pydantic still reads their Field metadata for the schema and
+# accepts the instances as-is inside PredictionResponse.
+@dataclasses.dataclass(slots=True, kw_only=True)
+class MoveAttribution:
     """Breakdown of why a move was scored a certain way."""
-    aggression_bonus: float = Field(default=0.0, description="Bonus from aggression alignment")
-    complexity_bonus: float = Field(default=0.0, description="Bonus from complexity preference")
-    trade_penalty: float = Field(default=0.0, description="Penalty for trade offers")
-    greed_bonus: float = Field(default=0.0, description="Bonus from material greed")
-    space_bonus: float = Field(default=0.0, description="Bonus from space expansion")
-    tilt_modifier: float = Field(default=0.0, description="Modifier from tilt state")
+    aggression_bonus: Annotated[float, Field(description="Bonus from aggression alignment")] = 0.0
+    complexity_bonus: Annotated[float, Field(description="Bonus from complexity preference")] = 0.0
+    trade_penalty: Annotated[float, Field(description="Penalty for trade offers")] = 0.0
+    greed_bonus: Annotated[float, Field(description="Bonus from material greed")] = 0.0
+    space_bonus: Annotated[float, Field(description="Bonus from space expansion")] = 0.0
+    tilt_modifier: Annotated[float, Field(description="Modifier from tilt state")] = 0.0
 
 
-class CandidateMove(BaseModel):
+@dataclasses.dataclass(slots=True, kw_only=True)
+class CandidateMove:
     """A candidate move with full attribution."""
-    move: str = Field(description="Move in SAN notation")
-    move_uci: str = Field(description="Move in UCI notation")
-    engine_eval: float = Field(description="Engine evaluation (centipawns)")
-    engine_rank: int = Field(description="Engine ranking (1 = best)")
-    history_frequency: float = Field(default=0.0, description="Historical frequency (0-1)")
-    style_fit: float = Field(default=0.0, description="Style fit score")
-    raw_score: float = Field(description="Raw weighted score before softmax")
-    final_prob: float = Field(description="Final probability (0-100)")
-    attribution: MoveAttribution = Field(default_factory=MoveAttribution)
-    reason: str = Field(default="", description="Human-readable explanation")
-
-
-class PhaseWeights(BaseModel):
+    move: Annotated[str, Field(description="Move in SAN notation")]
+    move_uci: Annotated[str, Field(description="Move in UCI notation")]
+    engine_eval: Annotated[float, Field(description="Engine evaluation (centipawns)")]
+    engine_rank: Annotated[int, Field(description="Engine ranking (1 = best)")]
+    history_frequency: Annotated[float, Field(description="Historical frequency (0-1)")] = 0.0
+    style_fit: Annotated[float, Field(description="Style fit score")] = 0.0
+    raw_score: Annotated[float, Field(description="Raw weighted score before softmax")]
+    final_prob: Annotated[float, Field(description="Final probability (0-100)")]
+    attribution: MoveAttribution = dataclasses.field(default_factory=MoveAttribution)
+    reason: Annotated[str, Field(description="Human-readable explanation")] = ""
+
+
+@dataclass(slots=True, kw_only=True, frozen=True)
+class PhaseWeights:
     """Current phase weights being applied."""
     phase: str = Field(description="opening, middlegame, or endgame")
     history: float = Field(description="Alpha weight for history")
@@ -79,13 +97,15 @@ class PhaseWeights(BaseModel):
     weight_mode: str = Field(default="phase", description="'habit' (PI>0.85), 'chameleon' (PI<0.40), 'phase' (default)")
 
 
-class TraceLogEntry(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class TraceLogEntry:
     """A single entry in the logic trace log."""
     type: str = Field(description="logic, warning, decision, tilt")
     message: str
 
 
-class HabitDetection(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class HabitDetection:
     """Habit detection result for the '95% Move' feature."""
     detected: bool = Field(default=False, description="True if a dominant habit move exists")
     move: Optional[str] = Field(default=None, description="The habit move in SAN")
@@ -93,7 +113,8 @@ class HabitDetection(BaseModel):
     sample_size: int = Field(default=0, description="Number of games in sample")
 
 
-class MoveSourceAttribution(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class MoveSourceAttribution:
     """Attribution of where move prediction came from."""
     primary_source: str = Field(default="engine", description="'history', 'style', or 'engine'")
     history_contribution: float = Field(default=0.0, description="Percentage from history (0-100)")
@@ -101,7 +122,8 @@ class MoveSourceAttribution(BaseModel):
     engine_contribution: float = Field(default=0.0, description="Percentage from engine (0-100)")
 
 
-class TacticalGuardrail(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class TacticalGuardrail:
     """Tactical Guardrail result for forced tactics detection."""
     triggered: bool = Field(default=False, description="True if guardrail overrode style weights")
     eval_delta: float = Field(default=0.0, description="Centipawn gap between M1 and M2")
@@ -3,9 +3,13 @@ Scout Predictor - Core prediction engine with hybrid mode support.
 Implements the Weighted Softmax formula for style-weighted move prediction.
 """
 
+import asyncio
 import chess
+import heapq
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 import random
 
 from models import (
@@ -14,10 +18,31 @@ from models import (
     PhaseWeights, TraceLogEntry, HabitDetection, MoveSourceAttribution,
     TacticalGuardrail
 )
-from engine import EngineWrapper
+from engine import AsyncEngineWrapper, DEFAULT_POOL_SIZE, board_from_fen
 from heuristics import ChessHeuristics
 
 
+@lru_cache(maxsize=None)
+def _phase_message(phase: str, history: float, engine: float, style: float) -> str:
+    """
+    Trace line for the weights in use. The weights always come from the
+    predictor's constant tables, so this only ever formats a handful of lines.
+    """
+    return f"Phase: {phase} (α={history:.2f}, β={engine:.2f}, γ={style:.2f})"
+
+
+def _history_by_frequency(history_moves: List[HistoryMove], first: int = 1) -> Iterator[HistoryMove]:
+    """
+    History moves most frequent first (ties in input order, as a stable sort).
+    Only the top `first` are selected up front; the full sort runs only if the
+    caller reads past them, e.g. because those moves turned out illegal.
+    """
+    frequency = attrgetter("frequency")
+    yield from heapq.nlargest(first, history_moves, key=frequency)
+    if len(history_moves) > first:
+        yield from sorted(history_moves, key=frequency, reverse=True)[first:]
+
+
 class ScoutPredictor:
     """
     Main prediction engine that combines history, engine analysis, and style markers.
@@ -29,6 +54,8 @@ class ScoutPredictor:
         "middlegame": {"history": 0.1, "engine": 0.4, "style": 0.5},
         "endgame": {"history": 0.05, "engine": 0.8, "style": 0.15},
     }
+    # The same weights as shared (frozen) PhaseWeights, one per phase
+    _PHASE_TABLE = {phase: PhaseWeights(phase=phase, **w) for phase, w in PHASE_WEIGHTS.items()}
 
     # When it is not the opponent's turn (planning / your-move context), we disable
     # style and focus on history vs engine.
@@ -46,20 +73,67 @@ class ScoutPredictor:
     # Low sample fallback - ignore history
     LOW_SAMPLE_WEIGHTS = {"history": 0.0, "engine": 0.30, "style": 0.70}
     
+    # Blunder simulation picks the 3rd or 4th best move
+    BLUNDER_MIN_CANDIDATES = 4
+    
+    # Stockfish (depth, multipv) per phase: the opening leans on history
+    # (engine weight 0.1), so a shallower, narrower search is enough there.
+    # Multi-PV never drops below BLUNDER_MIN_CANDIDATES so blunder
+    # simulation still has a 3rd/4th best move to pick.
+    ENGINE_SEARCH_LIMITS = {
+        "opening": (12, 4),
+        "middlegame": (18, 5),
+        "endgame": (20, 5),
+    }
+    # Pure history mode only searches as a fallback
+    PURE_HISTORY_SEARCH_LIMITS = (10, 3)
+    # Habit weighting (β=0.05) barely uses the engine: cap the depth, and
+    # narrow to multipv 4 (the blunder simulation minimum) whenever the
+    # engine weight is below 0.1
+    HABIT_SEARCH_DEPTH = 10
+    LOW_ENGINE_WEIGHT = 0.1
+    LOW_ENGINE_MULTIPV = BLUNDER_MIN_CANDIDATES
+    
     # Thresholds
     MIN_SAMPLE_SIZE = 5  # N < 5 means ignore history
     HABIT_PI_THRESHOLD = 0.85  # PI > 0.85 = "95% Move"
     CHAMELEON_PI_THRESHOLD = 0.40  # PI < 0.40 = "Chameleon"
     HABIT_DISPLAY_THRESHOLD = 0.90  # Display habit banner if frequency > 90%
     HABIT_MIN_SAMPLE = 10  # Minimum N for habit banner
+    HABIT_BOOK_MOVES = BLUNDER_MIN_CANDIDATES  # History moves the engine checks in habit positions
+    
+    def __init__(
+        self,
+        stockfish_path: str = "stockfish",
+        engine_pool_size: int = DEFAULT_POOL_SIZE,
+        seed: Optional[int] = None,
+        trace_enabled: bool = True
+    ):
+        """
+        Initialize the predictor with a pool of Stockfish engines (see start()).
+        seed fixes the move sampling / blunder simulation for reproducible runs;
+        trace_enabled=False skips building the logic trace log.
+        """
+        self.engine = AsyncEngineWrapper(stockfish_path, pool_size=engine_pool_size)
+        # Own RNG rather than the shared module-level one
+        self._rng = random.Random(seed)
+        self.trace_enabled = trace_enabled
     
-    def __init__(self, stockfish_path: str = "stockfish"):
-        """Initialize the predictor with Stockfish engine."""
-        self.engine = EngineWrapper(stockfish_path)
+    async def start(self):
+        """Spawn the engine processes."""
+        await self.engine.start()
     
-    def close(self):
+    async def close(self):
         """Clean up resources."""
-        self.engine.close()
+        await self.engine.close()
+    
+    def _trace(self, trace_log: List[TraceLogEntry], entry_type: str, message: str, *args: Any):
+        """
+        Append a trace entry; message is %-formatted with args (like logging)
+        only when tracing is enabled.
+        """
+        if self.trace_enabled:
+            trace_log.append(TraceLogEntry(type=entry_type, message=message % args if args else message))
     
     def _determine_phase(self, move_number: int) -> str:
         """Determine game phase based on move number."""
@@ -70,38 +144,47 @@ class ScoutPredictor:
         else:
             return "endgame"
     
-    def _calculate_pi(self, history_moves: List[HistoryMove]) -> Tuple[float, int]:
+    def _search_limits(self, mode: PredictionMode, weights: PhaseWeights) -> Tuple[int, int]:
+        """(depth, multipv) for the top-N engine search of a request."""
+        if mode == PredictionMode.PURE_HISTORY:
+            return self.PURE_HISTORY_SEARCH_LIMITS
+        depth, multipv = self.ENGINE_SEARCH_LIMITS[weights.phase]
+        if weights.weight_mode == "habit":
+            depth = min(depth, self.HABIT_SEARCH_DEPTH)
+        if weights.engine < self.LOW_ENGINE_WEIGHT:
+            multipv = min(multipv, self.LOW_ENGINE_MULTIPV)
+        return depth, multipv
+    
+    def _calculate_pi(self, history_moves: List[HistoryMove], total: int) -> Tuple[float, int]:
         """
         Calculate the Predictability Index (PI) for a position.
         PI = sum of squared frequencies (normalized).
+        total is the sum of history_moves' frequencies.
         
         Returns (PI value 0-1, sample size N)
         """
-        if not history_moves:
+        if not history_moves or total == 0:
             return 0.0, 0
         
-        total = sum(hm.frequency for hm in history_moves)
-        if total == 0:
-            return 0.0, 0
-        
-        # PI = sum of (p_i)^2 where p_i is the normalized frequency
-        pi = sum((hm.frequency / total) ** 2 for hm in history_moves)
+        # PI = sum of (p_i)^2 where p_i is the normalized frequency, i.e. the
+        # (exact, integer) sum of squared counts over total^2
+        pi = sum(hm.frequency * hm.frequency for hm in history_moves) / (total * total)
         return pi, total
     
-    def _detect_habit(self, history_moves: List[HistoryMove]) -> HabitDetection:
+    def _detect_habit(self, history_moves: List[HistoryMove], total: int) -> HabitDetection:
         """
         Detect if there's a dominant "habit" move (>90% frequency with N>10).
+        total is the sum of history_moves' frequencies.
         """
         if not history_moves:
             return HabitDetection()
         
-        total = sum(hm.frequency for hm in history_moves)
         if total < self.HABIT_MIN_SAMPLE:
             return HabitDetection(sample_size=total)
         
-        # Find highest frequency move
-        sorted_moves = sorted(history_moves, key=lambda x: x.frequency, reverse=True)
-        top_move = sorted_moves[0]
+        # Find highest frequency move (max keeps the first of any tie, as the
+        # stable descending sort did)
+        top_move = max(history_moves, key=attrgetter("frequency"))
         freq_pct = (top_move.frequency / total) * 100
         
         if freq_pct >= self.HABIT_DISPLAY_THRESHOLD * 100:
@@ -118,10 +201,12 @@ class ScoutPredictor:
         self, 
         move_number: int, 
         history_moves: List[HistoryMove],
+        history_total: int,
         is_opponent_turn: bool = True,
     ) -> Tuple[PhaseWeights, str]:
         """
         Get weights using dynamic PI-based logic.
+        history_total is the sum of history_moves' frequencies.
         
         Returns (PhaseWeights, weight_mode)
         """
@@ -137,10 +222,10 @@ class ScoutPredictor:
                 engine=weights["engine"],
                 style=weights["style"],
                 predictability_index=0.0,
-                sample_size=sum(hm.frequency for hm in history_moves) if history_moves else 0,
+                sample_size=history_total,
                 weight_mode="non_opponent_turn",
             ), "non_opponent_turn"
-        pi, sample_size = self._calculate_pi(history_moves)
+        pi, sample_size = self._calculate_pi(history_moves, history_total)
         
         # Phase 1: Confidence threshold - if N < 5, ignore history
         if sample_size < self.MIN_SAMPLE_SIZE:
@@ -172,77 +257,84 @@ class ScoutPredictor:
     
     def _get_phase_weights(self, move_number: int) -> PhaseWeights:
         """Get the alpha, beta, gamma weights for the current phase (legacy method)."""
-        phase = self._determine_phase(move_number)
-        weights = self.PHASE_WEIGHTS[phase]
-        return PhaseWeights(
-            phase=phase,
-            history=weights["history"],
-            engine=weights["engine"],
-            style=weights["style"]
-        )
+        return self._PHASE_TABLE[self._determine_phase(move_number)]
     
     def _normalize_history(
         self,
-        history_moves: List[HistoryMove],
+        history_freq: Dict[str, int],
+        history_total: int,
         candidate_moves: List[str]
-    ) -> Dict[str, float]:
+    ) -> np.ndarray:
         """
-        Normalize history frequencies to 0-1 range for candidate moves.
+        Normalize history frequencies to 0-1 range for candidate moves,
+        returned in candidate_moves order.
         Applies recency bias: recent games weighted 2x, old games 0.5x.
         """
-        if not history_moves:
-            return {m: 0.0 for m in candidate_moves}
-        
-        # Build frequency map
-        freq_map = {}
-        total = 0
-        for hm in history_moves:
-            # Simple recency bias (would need actual dates for full implementation)
-            weight = 1.0
-            freq_map[hm.move_san] = hm.frequency * weight
-            total += hm.frequency * weight
-        
-        # Normalize
-        result = {}
-        for move in candidate_moves:
-            if move in freq_map and total > 0:
-                result[move] = freq_map[move] / total
-            else:
-                result[move] = 0.0
+        if not history_freq or history_total <= 0:
+            return np.zeros(len(candidate_moves))
         
-        return result
+        # Normalize (simple recency bias would weight history_freq here;
+        # it needs actual dates for a full implementation)
+        freqs = np.fromiter(
+            (history_freq.get(move, 0) for move in candidate_moves), dtype=np.float64, count=len(candidate_moves)
+        )
+        return freqs / history_total
     
     def _normalize_engine_evals(
         self,
         engine_analysis: List[Dict[str, Any]]
-    ) -> Dict[str, float]:
+    ) -> np.ndarray:
         """
-        Normalize engine evaluations.
+        Normalize engine evaluations, returned in engine_analysis order.
         E_m = (Eval_move - Eval_best) normalized to 0-1.
-        Best move gets 1.0, worst gets 0.0.
+        Best move gets 1.0, worst gets 0.0 (all 0.0 if they're all equal).
+        The list needn't be sorted: history additions are appended after
+        the engine's lines and can score above or below them.
         """
-        if not engine_analysis:
-            return {}
-        
-        best_score = engine_analysis[0]["score_cp"]
-        worst_score = engine_analysis[-1]["score_cp"]
-        score_range = best_score - worst_score if best_score != worst_score else 1
-        
-        result = {}
-        for analysis in engine_analysis:
-            move = analysis["move_san"]
-            score = analysis["score_cp"]
-            # Normalize so best = 1.0, worst = 0.0
-            normalized = (score - worst_score) / score_range if score_range != 0 else 1.0
-            result[move] = normalized
-        
-        return result
+        scores = np.fromiter(
+            (analysis["score_cp"] for analysis in engine_analysis), dtype=np.float64, count=len(engine_analysis)
+        )
+        if not len(scores):
+            return scores
+        
+        worst_score = scores.min()
+        score_range = scores.max() - worst_score
+        if score_range == 0:
+            return np.zeros_like(scores)
+        
+        # Normalize so best = 1.0, worst = 0.0
+        scores -= worst_score
+        scores /= score_range
+        return scores
     
-    def _softmax(self, scores: List[float], temperature: float = 1.0) -> List[float]:
-        """Apply softmax to convert scores to probabilities."""
-        scores = np.array(scores) / temperature
-        exp_scores = np.exp(scores - np.max(scores))  # Subtract max for numerical stability
-        return (exp_scores / exp_scores.sum()).tolist()
+    def _softmax(self, scores: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+        """
+        Apply softmax to convert scores to probabilities (one scratch buffer, updated in place).
+        Normalizes along the last axis, so a [batch, n] array is one softmax per row.
+        """
+        z = scores / temperature
+        z -= z.max(axis=-1, keepdims=True)  # Subtract max for numerical stability
+        np.exp(z, out=z)
+        z /= z.sum(axis=-1, keepdims=True)
+        return z
+    
+    def _weighted_softmax(
+        self,
+        components: np.ndarray,
+        weights: PhaseWeights,
+        temperature: float = 1.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Raw scores α*H + β*E + γ*S and their softmax probabilities.
+        components holds the (H, E, S) scores in its last axis: [n, 3] for
+        one prediction, or [batch, n, 3] for several at once.
+        """
+        raw = (
+            weights.history * components[..., 0] +
+            weights.engine * components[..., 1] +
+            weights.style * components[..., 2]
+        )
+        return raw, self._softmax(raw, temperature)
     
     def _generate_reason(
         self,
@@ -297,9 +389,9 @@ class ScoutPredictor:
         # High blunder rate + high tension = likely blunder
         blunder_chance = (blunder_rate / 100) * min(1.0, tension / 10)
         
-        if random.random() < blunder_chance and len(candidates) >= 4:
+        if self._rng.random() < blunder_chance and len(candidates) >= self.BLUNDER_MIN_CANDIDATES:
             # Pick 3rd or 4th best move
-            return random.choice([2, 3])
+            return self._rng.choice((2, 3))
         
         return None
     
@@ -332,7 +424,8 @@ class ScoutPredictor:
         
         # Check if M1 is a forcing move
         try:
-            move = board.parse_san(m1["move_san"])
+            # Engine moves carry their UCI: a fixed-format parse, no SAN resolution
+            move = chess.Move.from_uci(m1["move_uci"])
             is_forcing = ChessHeuristics.is_forcing_move(board, move)
         except Exception:
             is_forcing = False
@@ -340,10 +433,7 @@ class ScoutPredictor:
         # Guardrail triggers if delta > threshold AND move is forcing
         if eval_delta >= self.TACTICAL_GUARDRAIL_THRESHOLD_CP and is_forcing:
             reason = f"M1 ({m1['move_san']}) is {eval_delta/100:.1f} pawns better than M2 and is a forcing move"
-            trace_log.append(TraceLogEntry(
-                type="decision",
-                message=f"TACTICAL GUARDRAIL: {reason}. Style bias ignored."
-            ))
+            self._trace(trace_log, "decision", "TACTICAL GUARDRAIL: %s. Style bias ignored.", reason)
             return TacticalGuardrail(
                 triggered=True,
                 eval_delta=eval_delta / 100,  # Convert to pawns for display
@@ -358,7 +448,7 @@ class ScoutPredictor:
             reason=""
         )
     
-    def predict(
+    async def predict(
         self,
         fen: str,
         mode: PredictionMode,
@@ -368,6 +458,7 @@ class ScoutPredictor:
         recent_eval_deltas: List[float],
         move_number: int,
         is_opponent_turn: bool = True,
+        moves_uci: Optional[List[str]] = None,
     ) -> PredictionResponse:
         """
         Main prediction method.
@@ -375,55 +466,107 @@ class ScoutPredictor:
         Pure History Mode: Sequential fallback (history -> engine)
         Hybrid Mode: Weighted softmax of history, engine, and style
         """
-        trace_log: List[TraceLogEntry] = []
-        board = chess.Board(fen)
-        
-        # Get dynamic weights based on PI
-        weights, weight_mode = self._get_dynamic_weights(move_number, history_moves, is_opponent_turn)
-        
-        # Detect habit moves
-        habit_detection = self._detect_habit(history_moves)
-        
-        trace_log.append(TraceLogEntry(
-            type="logic",
-            message=f"Phase: {weights.phase} (α={weights.history:.2f}, β={weights.engine:.2f}, γ={weights.style:.2f})"
-        ))
-        trace_log.append(TraceLogEntry(
-            type="logic",
-            message=f"PI={weights.predictability_index:.2f}, N={weights.sample_size}, Mode={weight_mode}"
-        ))
-        
-        if habit_detection.detected:
-            trace_log.append(TraceLogEntry(
-                type="decision",
-                message=f"HABIT: {habit_detection.move} played {habit_detection.frequency:.0f}% of the time (N={habit_detection.sample_size})"
-            ))
+        engine_task = None
         
-        # Check for tilt state
-        tilt_active = ChessHeuristics.detect_tilt(recent_eval_deltas)
-        working_markers = style_markers
-        if tilt_active:
-            trace_log.append(TraceLogEntry(
-                type="tilt",
-                message="TILT DETECTED: Recent blunders detected. Aggression doubled, accuracy halved."
-            ))
-            working_markers = ChessHeuristics.apply_tilt_modifiers(
-                style_markers,
-                MoveAttribution()
+        try:
+            trace_log: List[TraceLogEntry] = []
+            board = board_from_fen(fen)
+            
+            # Index the history once: frequency by SAN plus the total, shared
+            # by every stage below instead of each re-scanning history_moves
+            history_freq: Dict[str, int] = {}
+            history_total = 0
+            for hm in history_moves:
+                history_freq[hm.move_san] = hm.frequency
+                history_total += hm.frequency
+        
+            # Get dynamic weights based on PI
+            weights, weight_mode = self._get_dynamic_weights(move_number, history_moves, history_total, is_opponent_turn)
+        
+            # Detect habit moves
+            habit_detection = self._detect_habit(history_moves, history_total)
+            
+            # Search effort follows how much the engine will count
+            depth, multipv = self._search_limits(mode, weights)
+            
+            # Start the engine search (Top N) now: Stockfish runs in its own
+            # process while the bookkeeping below proceeds, so latency is
+            # max(engine, bookkeeping) rather than the sum.
+            # Pure history mode only needs the engine as a fallback, so it
+            # searches only once history has come up empty. Habit-weighted
+            # positions are decided by history, so the engine only checks the
+            # top history moves there instead of running the full Multi-PV
+            # search. A detected habit alone doesn't qualify: other weight
+            # modes (e.g. non_opponent_turn) still lean on the engine.
+            book_moves = []
+            if mode != PredictionMode.PURE_HISTORY:
+                if weight_mode == "habit":
+                    book_moves = self._habit_book_moves(board, history_moves)
+                if book_moves:
+                    search = self._analyze_book_moves(fen, book_moves)
+                else:
+                    search = self.engine.analyze_position(fen, depth=depth, multipv=multipv, moves_uci=moves_uci)
+                engine_task = asyncio.create_task(search)
+        
+            if self.trace_enabled:
+                self._trace(
+                    trace_log, "logic",
+                    _phase_message(weights.phase, weights.history, weights.engine, weights.style)
+                )
+            self._trace(
+                trace_log, "logic",
+                "PI=%.2f, N=%s, Mode=%s", weights.predictability_index, weights.sample_size, weight_mode
             )
         
-        # Get engine analysis (Top 5)
-        engine_analysis = self.engine.analyze_position(fen, depth=18, multipv=5)
+            if habit_detection.detected:
+                self._trace(
+                    trace_log, "decision",
+                    "HABIT: %s played %.0f%% of the time (N=%s)",
+                    habit_detection.move, habit_detection.frequency, habit_detection.sample_size
+                )
+            if book_moves:
+                self._trace(
+                    trace_log, "logic",
+                    "Habit position: engine checks only the top %d history moves", len(book_moves)
+                )
+        
+            # Check for tilt state
+            tilt_active = ChessHeuristics.detect_tilt(recent_eval_deltas)
+            working_markers = style_markers
+            if tilt_active:
+                self._trace(
+                    trace_log, "tilt",
+                    "TILT DETECTED: Recent blunders detected. Aggression doubled, accuracy halved."
+                )
+                working_markers = ChessHeuristics.apply_tilt_modifiers(
+                    style_markers,
+                    MoveAttribution()
+                )
+            
+            if engine_task is None:
+                history_pick = self._select_history_move(board, history_moves, trace_log)
+                if history_pick is not None:
+                    return self._predict_pure_history(
+                        board, [], history_freq, history_total, weights, trace_log, tilt_active, habit_detection, history_pick
+                    )
+                engine_task = asyncio.create_task(
+                    self.engine.analyze_position(fen, depth=depth, multipv=multipv, moves_uci=moves_uci)
+                )
+        except BaseException:
+            # Don't leave the search running for a request that already failed
+            if engine_task is not None:
+                engine_task.cancel()
+            raise
+        
+        # Wait for the engine analysis started above
+        engine_analysis = await engine_task
         
         if not engine_analysis:
             # Fallback: no engine available
-            trace_log.append(TraceLogEntry(
-                type="warning",
-                message="Engine unavailable. Using random legal move."
-            ))
+            self._trace(trace_log, "warning", "Engine unavailable. Using random legal move.")
             legal_moves = list(board.legal_moves)
             if legal_moves:
-                move = random.choice(legal_moves)
+                move = self._rng.choice(legal_moves)
                 return PredictionResponse(
                     prediction_mode=mode,
                     selected_move=board.san(move),
@@ -438,95 +581,160 @@ class ScoutPredictor:
         
         # Log engine analysis
         for ea in engine_analysis[:3]:
-            trace_log.append(TraceLogEntry(
-                type="logic",
-                message=f"Engine: {ea['move_san']} (eval: {ea['score_cp']/100:.2f})"
-            ))
-        
-        candidate_sans = [ea["move_san"] for ea in engine_analysis]
+            self._trace(trace_log, "logic", "Engine: %s (eval: %.2f)", ea["move_san"], ea["score_cp"] / 100)
         
         # Pure History Mode
         if mode == PredictionMode.PURE_HISTORY:
             return self._predict_pure_history(
-                board, engine_analysis, history_moves, weights, trace_log, tilt_active, habit_detection
+                board, engine_analysis, history_freq, history_total, weights, trace_log, tilt_active, habit_detection, None
             )
         
         # Hybrid Mode
-        return self._predict_hybrid(
-            board, engine_analysis, history_moves, working_markers,
+        return await self._predict_hybrid(
+            board, engine_analysis, history_moves, history_freq, history_total, working_markers,
             weights, trace_log, tilt_active, move_number, habit_detection
         )
     
+    def _habit_book_moves(
+        self,
+        board: chess.Board,
+        history_moves: List[HistoryMove]
+    ) -> List[Tuple[str, chess.Move]]:
+        """The most frequent legal history moves (up to HABIT_BOOK_MOVES), as (SAN, move)."""
+        book_moves = []
+        for hm in _history_by_frequency(history_moves, self.HABIT_BOOK_MOVES):
+            try:
+                move = board.parse_san(hm.move_san)
+            except ValueError:
+                continue
+            if board.is_legal(move):
+                book_moves.append((hm.move_san, move))
+                if len(book_moves) == self.HABIT_BOOK_MOVES:
+                    break
+        return book_moves
+    
+    async def _analyze_book_moves(
+        self,
+        fen: str,
+        book_moves: List[Tuple[str, chess.Move]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Engine analysis restricted to the given moves, shaped like
+        analyze_position's output (best first, ranked). One shallow search
+        limited to those moves.
+        """
+        if not self.engine.is_ready():
+            return []
+        
+        evals = await self.engine.analyze_moves(fen, [move.uci() for _, move in book_moves])
+        analysis = [
+            {
+                "move_uci": move.uci(),
+                "move_san": move_san,
+                "score_cp": eval_info["score_cp"],
+                "score_mate": eval_info.get("score_mate"),
+                "pv": [move.uci()],
+            }
+            for (move_san, move), eval_info in zip(book_moves, evals)
+        ]
+        analysis.sort(key=itemgetter("score_cp"), reverse=True)
+        for rank, entry in enumerate(analysis, 1):
+            entry["rank"] = rank
+        return analysis
+    
+    def _select_history_move(
+        self,
+        board: chess.Board,
+        history_moves: List[HistoryMove],
+        trace_log: List[TraceLogEntry]
+    ) -> Optional[Tuple[HistoryMove, chess.Move]]:
+        """Most frequent legal history move, or None if history has none."""
+        # Validate the move is legal, most frequent first (usually the top
+        # move is, and the history never gets fully sorted)
+        for hm in _history_by_frequency(history_moves):
+            try:
+                # parse_san already resolves against the legal moves; is_legal
+                # only rejects the null move instead of rescanning the generator
+                move = board.parse_san(hm.move_san)
+                if board.is_legal(move):
+                    self._trace(trace_log, "decision", "Selected %s from history (freq: %s)", hm.move_san, hm.frequency)
+                    return hm, move
+            except:
+                continue
+        return None
+    
     def _predict_pure_history(
         self,
         board: chess.Board,
         engine_analysis: List[Dict[str, Any]],
-        history_moves: List[HistoryMove],
+        history_freq: Dict[str, int],
+        history_total: int,
         weights: PhaseWeights,
         trace_log: List[TraceLogEntry],
         tilt_active: bool,
-        habit_detection: HabitDetection
+        habit_detection: HabitDetection,
+        history_pick: Optional[Tuple[HistoryMove, chess.Move]]
     ) -> PredictionResponse:
-        """Pure history mode: Use history if available, fallback to engine."""
-        
-        # Check if we have history for any of the legal moves
-        history_map = {hm.move_san: hm for hm in history_moves}
+        """
+        Pure history mode: Use history if available, fallback to engine.
+        history_pick is the move _select_history_move found; without one,
+        engine_analysis supplies the fallback.
+        """
         
+
         # Try to find a historical move
         selected_move = None
         selected_uci = None
         
-        if history_moves:
-            # Sort by frequency
-            sorted_history = sorted(history_moves, key=lambda x: x.frequency, reverse=True)
-            
-            # Validate the move is legal
-            for hm in sorted_history:
-                try:
-                    move = board.parse_san(hm.move_san)
-                    if move in board.legal_moves:
-                        selected_move = hm.move_san
-                        selected_uci = move.uci()
-                        trace_log.append(TraceLogEntry(
-                            type="decision",
-                            message=f"Selected {selected_move} from history (freq: {hm.frequency})"
-                        ))
-                        break
-                except:
-                    continue
+        if history_pick is not None:
+            selected_move = history_pick[0].move_san
+            selected_uci = history_pick[1].uci()
         
         # Fallback to engine
         if not selected_move:
             selected_move = engine_analysis[0]["move_san"]
             selected_uci = engine_analysis[0]["move_uci"]
-            trace_log.append(TraceLogEntry(
-                type="decision",
-                message=f"No history found. Fallback to engine: {selected_move}"
-            ))
+            self._trace(trace_log, "decision", "No history found. Fallback to engine: %s", selected_move)
         
         # Build candidate list
         candidates = []
         for ea in engine_analysis:
-            hm = history_map.get(ea["move_san"])
+            freq = history_freq.get(ea["move_san"])
             candidates.append(CandidateMove(
                 move=ea["move_san"],
                 move_uci=ea["move_uci"],
                 engine_eval=ea["score_cp"] / 100,
                 engine_rank=ea["rank"],
-                history_frequency=hm.frequency / sum(h.frequency for h in history_moves) if hm and history_moves else 0,
-                style_fit=0,
-                raw_score=0,
-                final_prob=100 if ea["move_san"] == selected_move else 0,
+                history_frequency=freq / history_total if freq and history_total else 0.0,
+                style_fit=0.0,
+                raw_score=0.0,
+                final_prob=100.0 if ea["move_san"] == selected_move else 0.0,
                 attribution=MoveAttribution(),
                 reason="Selected from history" if ea["move_san"] == selected_move else ""
             ))
         
+        if not engine_analysis:
+            # The engine search was skipped: show the history move on its own
+            hm = history_pick[0]
+            candidates.append(CandidateMove(
+                move=selected_move,
+                move_uci=selected_uci,
+                engine_eval=0.0,
+                engine_rank=0,
+                history_frequency=hm.frequency / history_total if history_total else 0.0,
+                style_fit=0.0,
+                raw_score=0.0,
+                final_prob=100.0,
+                attribution=MoveAttribution(),
+                reason="Selected from history"
+            ))
+        
         # Determine move source attribution
         move_source = MoveSourceAttribution(
-            primary_source="history" if history_moves else "engine",
-            history_contribution=100.0 if history_moves else 0.0,
+            primary_source="history" if history_freq else "engine",
+            history_contribution=100.0 if history_freq else 0.0,
             style_contribution=0.0,
-            engine_contribution=0.0 if history_moves else 100.0
+            engine_contribution=0.0 if history_freq else 100.0
         )
         
         # Suggest fast move timing for habit moves
@@ -546,11 +754,13 @@ class ScoutPredictor:
             suggested_delay_ms=suggested_delay
         )
     
-    def _predict_hybrid(
+    async def _predict_hybrid(
         self,
         board: chess.Board,
         engine_analysis: List[Dict[str, Any]],
         history_moves: List[HistoryMove],
+        history_freq: Dict[str, int],
+        history_total: int,
         markers: StyleMarkers,
         weights: PhaseWeights,
         trace_log: List[TraceLogEntry],
@@ -575,10 +785,10 @@ class ScoutPredictor:
                     move_uci=ea["move_uci"],
                     engine_eval=ea["score_cp"] / 100,
                     engine_rank=ea["rank"],
-                    history_frequency=0,
-                    style_fit=0,
-                    raw_score=1.0 if ea["move_san"] == m1["move_san"] else 0,
-                    final_prob=100 if ea["move_san"] == m1["move_san"] else 0,
+                    history_frequency=0.0,
+                    style_fit=0.0,
+                    raw_score=1.0 if ea["move_san"] == m1["move_san"] else 0.0,
+                    final_prob=100.0 if ea["move_san"] == m1["move_san"] else 0.0,
                     attribution=MoveAttribution(),
                     reason="Tactical Truth: Forced tactic with 1.5+ pawn advantage" if ea["move_san"] == m1["move_san"] else ""
                 ))
@@ -605,136 +815,148 @@ class ScoutPredictor:
                 tactical_guardrail=tactical_guardrail
             )
         
-        # Start with engine's top moves
+        # Start with engine's top moves (candidate_sans keeps the order,
+        # seen_sans the membership test)
         candidate_sans = [ea["move_san"] for ea in engine_analysis]
-        engine_analysis_map = {ea["move_san"]: ea for ea in engine_analysis}
+        seen_sans = set(candidate_sans)
         
         # CRITICAL FIX: Add high-frequency historical moves that aren't in engine's top picks
         # This ensures moves like Nc6 (99% frequency) aren't excluded just because
         # Stockfish prefers other moves
-        total_history_freq = sum(hm.frequency for hm in history_moves) if history_moves else 0
         history_additions = []
+        pending_additions = []
         
         for hm in history_moves:
-            if hm.move_san not in candidate_sans:
+            if hm.move_san not in seen_sans:
                 # Include if frequency is significant (>10% of games OR >5 games)
-                freq_pct = (hm.frequency / total_history_freq * 100) if total_history_freq > 0 else 0
+                freq_pct = (hm.frequency / history_total * 100) if history_total > 0 else 0
                 if freq_pct >= 10 or hm.frequency >= 5:
                     # Validate move is legal
                     try:
                         move = board.parse_san(hm.move_san)
-                        if move in board.legal_moves:
+                        if board.is_legal(move):
                             candidate_sans.append(hm.move_san)
-                            # Get engine eval for this move
-                            eval_info = self.engine.analyze_single_move(board.fen(), move.uci())
-                            history_additions.append({
-                                "move_san": hm.move_san,
-                                "move_uci": move.uci(),
-                                "score_cp": eval_info.get("score_cp", -100),  # Default penalty if no eval
-                                "rank": len(engine_analysis) + len(history_additions) + 1,
-                                "from_history": True
-                            })
-                            trace_log.append(TraceLogEntry(
-                                type="logic",
-                                message=f"Added {hm.move_san} from history ({freq_pct:.0f}% freq, {hm.frequency} games)"
-                            ))
+                            seen_sans.add(hm.move_san)
+                            pending_additions.append((hm, move, freq_pct))
                     except Exception:
                         pass
         
-        # Merge history additions into engine analysis for processing
-        extended_analysis = list(engine_analysis) + history_additions
-        
-        # Normalize inputs with the expanded candidate list
-        history_scores = self._normalize_history(history_moves, candidate_sans)
-        engine_scores = self._normalize_engine_evals(extended_analysis)
+        # Get engine evals for all additions at once: one search restricted
+        # to those moves rather than a search per move
+        fen = board.fen()
+        pending_evals = asyncio.ensure_future(
+            self.engine.analyze_moves(fen, [move.uci() for _, move, _ in pending_additions])
+        )
         
-        # Calculate style fit for each move (including history additions)
-        style_scores = {}
-        attributions = {}
+        # Calculate style fit for all moves in one batch (including history
+        # additions) while those searches run. Scores and attributions are
+        # kept by candidate index (engine moves, then history additions);
+        # moves that fail to parse keep a zero score and neutral attribution.
+        style_scores = np.zeros(len(candidate_sans))
+        attributions: List[Optional[MoveAttribution]] = [None] * len(candidate_sans)
+        scored = []
         
-        for ea in extended_analysis:
-            move_san = ea["move_san"]
+        for i, ea in enumerate(engine_analysis):
             try:
-                move = board.parse_san(move_san)
-                style_fit, attribution = ChessHeuristics.calculate_style_fit(
-                    board, move, markers
-                )
-                style_scores[move_san] = style_fit
-                attributions[move_san] = attribution
-                
-                # Log significant style impacts (only for original engine moves to avoid spam)
-                if not ea.get("from_history"):
-                    if attribution.trade_penalty < 0:
-                        trace_log.append(TraceLogEntry(
-                            type="warning",
-                            message=f"{move_san} penalized {int(-attribution.trade_penalty * 100)}% for trade offer"
-                        ))
-                    if attribution.aggression_bonus > 0:
-                        trace_log.append(TraceLogEntry(
-                            type="logic",
-                            message=f"{move_san} boosted {int(attribution.aggression_bonus * 100)}% for aggression"
-                        ))
-                    
+                scored.append((i, ea["move_san"], chess.Move.from_uci(ea["move_uci"]), False))
             except Exception:
-                style_scores[move_san] = 0
-                attributions[move_san] = MoveAttribution()
-        
-        # Calculate weighted scores: α*H + β*E + γ*S
-        raw_scores = []
-        candidates = []
+                pass
+        scored.extend(
+            (len(engine_analysis) + j, hm.move_san, move, True)
+            for j, (hm, move, _) in enumerate(pending_additions)
+        )
         
-        for ea in extended_analysis:
-            move_san = ea["move_san"]
-            h_score = history_scores.get(move_san, 0)
-            e_score = engine_scores.get(move_san, 0)
-            s_score = style_scores.get(move_san, 0)
-            
-            raw = (
-                weights.history * h_score +
-                weights.engine * e_score +
-                weights.style * s_score
-            )
-            raw_scores.append(raw)
-            
-            candidates.append({
-                "move_san": move_san,
-                "move_uci": ea["move_uci"],
-                "engine_eval": ea["score_cp"] / 100,
-                "engine_rank": ea["rank"],
-                "history_freq": h_score,
-                "style_fit": s_score,
-                "raw_score": raw,
-                "attribution": attributions.get(move_san, MoveAttribution())
+        # Detectors are CPU-bound python-chess work: run them in a worker thread
+        # so other requests' engine I/O keeps flowing meanwhile (neutral
+        # markers need no detectors, so don't pay for the thread hop)
+        scored_moves = [move for _, _, move, _ in scored]
+        try:
+            if ChessHeuristics.needed_features(markers):
+                style_fits, attribution_matrix = await asyncio.to_thread(
+                    ChessHeuristics.calculate_style_fits, board, scored_moves, markers
+                )
+            else:
+                style_fits, attribution_matrix = ChessHeuristics.calculate_style_fits(board, scored_moves, markers)
+        except BaseException:
+            pending_evals.cancel()
+            raise
+        
+        eval_infos = await pending_evals
+        
+        for (hm, move, freq_pct), eval_info in zip(pending_additions, eval_infos):
+            history_additions.append({
+                "move_san": hm.move_san,
+                "move_uci": move.uci(),
+                "score_cp": eval_info.get("score_cp", -100),  # Default penalty if no eval
+                "rank": len(engine_analysis) + len(history_additions) + 1,
+                "from_history": True
             })
+            self._trace(
+                trace_log, "logic",
+                "Added %s from history (%.0f%% freq, %s games)", hm.move_san, freq_pct, hm.frequency
+            )
         
-        # Apply softmax
-        probabilities = self._softmax(raw_scores, temperature=0.5)
+        # Merge history additions into engine analysis for processing
+        extended_analysis = list(engine_analysis) + history_additions
+        
+        # Normalize inputs with the expanded candidate list
+        history_scores = self._normalize_history(history_freq, history_total, candidate_sans)
+        engine_scores = self._normalize_engine_evals(extended_analysis)
+        
+        style_scores[[i for i, _, _, _ in scored]] = style_fits
+        for (i, move_san, _, from_history), row in zip(scored, attribution_matrix):
+            attribution = ChessHeuristics.to_attribution(row)
+            attributions[i] = attribution
+            
+            # Log significant style impacts (only for original engine moves to avoid spam)
+            if not from_history:
+                if attribution.trade_penalty < 0:
+                    self._trace(
+                        trace_log, "warning",
+                        "%s penalized %d%% for trade offer", move_san, int(-attribution.trade_penalty * 100)
+                    )
+                if attribution.aggression_bonus > 0:
+                    self._trace(
+                        trace_log, "logic",
+                        "%s boosted %d%% for aggression", move_san, int(attribution.aggression_bonus * 100)
+                    )
+        
+        # Line up the (H, E, S) scores per candidate (all three are already in
+        # extended_analysis order), then weight and softmax them in one
+        # vectorized step: α*H + β*E + γ*S
+        components = np.empty((len(extended_analysis), 3))
+        components[:, 0] = history_scores
+        components[:, 1] = engine_scores
+        components[:, 2] = style_scores
+        
+        raw_scores, probabilities = self._weighted_softmax(components, weights, temperature=0.5)
+        
+        # Sort by probability (stable, so ties keep analysis order) while
+        # everything is still in arrays, then build the candidates once, in
+        # presentation order
+        order = np.argsort(-probabilities, kind="stable")
+        probabilities = probabilities[order]
         
-        # Build final candidates
         final_candidates = []
-        for i, cand in enumerate(candidates):
-            prob = probabilities[i] * 100
+        for i, (h_score, _, s_score), raw, prob_pct in zip(
+            order.tolist(), components[order].tolist(), raw_scores[order].tolist(), (probabilities * 100).tolist()
+        ):
+            ea = extended_analysis[i]
+            move_san = ea["move_san"]
+            attribution = attributions[i] or MoveAttribution()
             final_candidates.append(CandidateMove(
-                move=cand["move_san"],
-                move_uci=cand["move_uci"],
-                engine_eval=cand["engine_eval"],
-                engine_rank=cand["engine_rank"],
-                history_frequency=cand["history_freq"],
-                style_fit=cand["style_fit"],
-                raw_score=cand["raw_score"],
-                final_prob=prob,
-                attribution=cand["attribution"],
-                reason=self._generate_reason(
-                    cand["move_san"],
-                    cand["attribution"],
-                    cand["engine_rank"],
-                    cand["history_freq"]
-                )
+                move=move_san,
+                move_uci=ea["move_uci"],
+                engine_eval=ea["score_cp"] / 100,
+                engine_rank=ea["rank"],
+                history_frequency=h_score,
+                style_fit=s_score,
+                raw_score=raw,
+                final_prob=prob_pct,
+                attribution=attribution,
+                reason=self._generate_reason(move_san, attribution, ea["rank"], h_score)
             ))
         
-        # Sort by probability
-        final_candidates.sort(key=lambda x: x.final_prob, reverse=True)
-        
         # Check for blunder simulation
         blunder_applied = False
         tension = ChessHeuristics.calculate_board_tension(board)
@@ -743,27 +965,21 @@ class ScoutPredictor:
         if blunder_idx is not None:
             selected_idx = blunder_idx
             blunder_applied = True
-            trace_log.append(TraceLogEntry(
-                type="warning",
-                message=f"BLUNDER SIMULATION: High tension ({tension}) + blunder rate ({markers.blunder_rate:.0f}%). Selecting #{blunder_idx + 1} choice."
-            ))
+            self._trace(
+                trace_log, "warning",
+                "BLUNDER SIMULATION: High tension (%s) + blunder rate (%.0f%%). Selecting #%d choice.",
+                tension, markers.blunder_rate, blunder_idx + 1
+            )
         else:
-            # Select based on probability distribution
-            r = random.random() * 100
-            cumulative = 0
-            selected_idx = 0
-            for i, cand in enumerate(final_candidates):
-                cumulative += cand.final_prob
-                if r <= cumulative:
-                    selected_idx = i
-                    break
+            # Select based on probability distribution: inverse CDF over the
+            # sorted probabilities (first index whose cumulative reaches r)
+            cumulative = np.cumsum(probabilities)
+            selected_idx = int(np.searchsorted(cumulative, self._rng.random()))
+            selected_idx = min(selected_idx, len(final_candidates) - 1)
         
         selected = final_candidates[selected_idx]
         
-        trace_log.append(TraceLogEntry(
-            type="decision",
-            message=f"Selected: {selected.move} (prob: {selected.final_prob:.1f}%)"
-        ))
+        self._trace(trace_log, "decision", "Selected: %s (prob: %.1f%%)", selected.move, selected.final_prob)
         
         # Calculate move source attribution based on weights
         move_source = MoveSourceAttribution(
@@ -0,0 +1,85 @@
+"""
+Shared test fixtures: a stub engine standing in for the Stockfish pool.
+"""
+
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+# The service modules import each other by bare name (run from scout-api/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from predictor import ScoutPredictor  # noqa: E402
+
+
+class StubEngine:
+    """
+    Stands in for AsyncEngineWrapper: returns a fixed Multi-PV analysis and
+    records which search methods the predictor called.
+    """
+
+    def __init__(self, analysis: List[Dict[str, Any]]):
+        self.analysis = analysis
+        self.calls: List[tuple] = []
+
+    def is_ready(self) -> bool:
+        return True
+
+    async def analyze_position(
+        self,
+        fen: str,
+        depth: int = 18,
+        multipv: int = 5,
+        moves_uci: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        self.calls.append(("analyze_position", depth, multipv))
+        return [dict(entry) for entry in self.analysis[:multipv]]
+
+    async def analyze_moves(self, fen: str, moves_uci: List[str], depth: int = 12) -> List[Dict[str, Any]]:
+        if not moves_uci:
+            return []
+        self.calls.append(("analyze_moves", tuple(moves_uci)))
+        scores = {entry["move_uci"]: entry["score_cp"] for entry in self.analysis}
+        return [{"score_cp": scores.get(move_uci, -50)} for move_uci in moves_uci]
+
+    async def close(self):
+        pass
+
+
+def analysis_line(move_uci: str, move_san: str, score_cp: int, rank: int) -> Dict[str, Any]:
+    """One analyze_position-shaped entry."""
+    return {
+        "move_uci": move_uci,
+        "move_san": move_san,
+        "score_cp": score_cp,
+        "score_mate": None,
+        "rank": rank,
+        "pv": [move_uci],
+        "depth": 12,
+    }
+
+
+# After 1.e4 e5, White to move
+OPEN_GAME_FEN = "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"
+
+OPEN_GAME_ANALYSIS = [
+    analysis_line("g1f3", "Nf3", 50, 1),
+    analysis_line("d2d4", "d4", 30, 2),
+    analysis_line("b1c3", "Nc3", 20, 3),
+    analysis_line("f1c4", "Bc4", 15, 4),
+    analysis_line("f1b5", "Bb5", 10, 5),
+]
+
+
+@pytest.fixture
+def stub_engine() -> StubEngine:
+    return StubEngine(OPEN_GAME_ANALYSIS)
+
+
+@pytest.fixture
+def predictor(stub_engine: StubEngine) -> ScoutPredictor:
+    scout = ScoutPredictor(seed=0)
+    scout.engine = stub_engine
+    return scout
@@ -0,0 +1,75 @@
+"""
+Engine wrapper tests: result caching, with a stub UCI engine in the pool.
+"""
+
+import asyncio
+
+import chess
+import chess.engine
+
+from conftest import OPEN_GAME_FEN
+from engine import AsyncEngineWrapper
+
+
+class StubUciEngine:
+    """Answers analyse() with a flat +0.20 for every line and records each search."""
+
+    def __init__(self):
+        self.searches = []
+
+    async def analyse(self, board, limit, multipv=None, root_moves=None):
+        self.searches.append((board.fen(), len(board.move_stack), limit.depth, root_moves))
+        moves = root_moves or list(board.legal_moves)[:multipv or 1]
+        return [
+            {"pv": [move], "score": chess.engine.PovScore(chess.engine.Cp(20), board.turn), "depth": limit.depth}
+            for move in moves
+        ]
+
+    async def quit(self):
+        pass
+
+
+def stub_pool() -> tuple:
+    """An AsyncEngineWrapper whose single pooled engine is a StubUciEngine."""
+    wrapper = AsyncEngineWrapper("stub", pool_size=1)
+    stub = StubUciEngine()
+    wrapper._engines = [stub]
+    wrapper._idle = asyncio.Queue()
+    wrapper._idle.put_nowait(stub)
+    return wrapper, stub
+
+
+def test_analyze_moves_and_single_move_cache_separately():
+    async def run():
+        wrapper, stub = stub_pool()
+        # A depth-12 root line and a depth-12 search after the move are
+        # different searches, so neither may answer from the other's cache
+        await wrapper.analyze_moves(OPEN_GAME_FEN, ["g1f3"], depth=12)
+        await wrapper.analyze_single_move(OPEN_GAME_FEN, "g1f3", depth=12)
+        assert len(stub.searches) == 2
+
+        # ...but each is cached for its own caller
+        await wrapper.analyze_moves(OPEN_GAME_FEN, ["g1f3"], depth=12)
+        await wrapper.analyze_single_move(OPEN_GAME_FEN, "g1f3", depth=12)
+        assert len(stub.searches) == 2
+
+        stats = wrapper.cache_stats()
+        assert stats["move_list"]["hits"] == 1
+        assert stats["single_move"]["hits"] == 1
+
+    asyncio.run(run())
+
+
+def test_game_history_searches_cache_apart_from_fen():
+    async def run():
+        wrapper, stub = stub_pool()
+        await wrapper.analyze_position(OPEN_GAME_FEN, depth=12, multipv=2)
+        await wrapper.analyze_position(OPEN_GAME_FEN, depth=12, multipv=2, moves_uci=["e2e4", "e7e5"])
+        assert len(stub.searches) == 2
+        # Same position, but the second search ran on the replayed game
+        assert [search[:2] for search in stub.searches] == [(OPEN_GAME_FEN, 0), (OPEN_GAME_FEN, 2)]
+
+        await wrapper.analyze_position(OPEN_GAME_FEN, depth=12, multipv=2, moves_uci=["e2e4", "e7e5"])
+        assert len(stub.searches) == 2
+
+    asyncio.run(run())
@@ -0,0 +1,16 @@
+"""
+Heuristics tests: position-cached detectors.
+"""
+
+import chess
+
+from heuristics import ChessHeuristics
+
+
+def test_cached_detector_accepts_keyword_arguments():
+    # 1.e4 e5 2.Nf3 d5: exd5 grabs a pawn
+    board = chess.Board("rnbqkbnr/ppp2ppp/8/3pp3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 3")
+    move = chess.Move.from_uci("e4d5")
+
+    assert ChessHeuristics.is_material_grab(board, move, eval_drop_threshold=2.0) == \
+        ChessHeuristics.is_material_grab(board, move, 2.0)
@@ -0,0 +1,28 @@
+"""
+API helper tests: /analyze_moves style scoring.
+"""
+
+import chess
+
+import main
+from conftest import OPEN_GAME_FEN
+from heuristics import ChessHeuristics
+from models import StyleMarkers
+
+
+def test_style_scoring_failure_only_drops_the_failing_move(monkeypatch):
+    board = chess.Board(OPEN_GAME_FEN)
+    good, bad = chess.Move.from_uci("g1f3"), chess.Move.from_uci("f1c4")
+    calculate_style_fits = ChessHeuristics.calculate_style_fits
+
+    def flaky_style_fits(board, moves, markers):
+        if bad in moves:
+            raise ValueError("detector failure")
+        return calculate_style_fits(board, moves, markers)
+
+    monkeypatch.setattr(ChessHeuristics, "calculate_style_fits", flaky_style_fits)
+    rows = main._style_rows(board, [good, bad], StyleMarkers(aggression_index=90))
+
+    assert rows[1] is None
+    style_fit, attribution, badges = rows[0]
+    assert set(attribution) == set(main.ATTRIBUTION_FIELDS)
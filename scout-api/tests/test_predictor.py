@@ -0,0 +1,65 @@
+"""
+Predictor tests: which engine searches a request triggers.
+"""
+
+import asyncio
+
+from conftest import OPEN_GAME_FEN
+from models import HistoryMove, PredictionMode, StyleMarkers
+
+
+# Bc4 in 19 of 20 games: PI = 0.905 (habit weighting) and a detected habit
+HABIT_HISTORY = [
+    HistoryMove(move_san="Bc4", frequency=19),
+    HistoryMove(move_san="Bb5", frequency=1),
+]
+
+
+def predict(predictor, **overrides):
+    request = {
+        "fen": OPEN_GAME_FEN,
+        "mode": PredictionMode.HYBRID,
+        "opponent_username": "opponent",
+        "style_markers": StyleMarkers(),
+        "history_moves": HABIT_HISTORY,
+        "recent_eval_deltas": [],
+        "move_number": 20,
+    }
+    request.update(overrides)
+    return asyncio.run(predictor.predict(**request))
+
+
+def test_habit_weighting_checks_only_book_moves(predictor, stub_engine):
+    result = predict(predictor)
+
+    assert result.weights.weight_mode == "habit"
+    assert stub_engine.calls == [("analyze_moves", ("f1c4", "f1b5"))]
+    assert {c.move for c in result.candidates} == {"Bc4", "Bb5"}
+
+
+def test_detected_habit_outside_habit_weighting_runs_full_search(predictor, stub_engine):
+    # Not the opponent's turn: the engine carries 0.7 of the weight, so a
+    # detected habit must not replace the Multi-PV search
+    result = predict(predictor, is_opponent_turn=False)
+
+    assert result.weights.weight_mode == "non_opponent_turn"
+    assert result.habit_detection.detected
+    assert stub_engine.calls[0][0] == "analyze_position"
+    assert "Nf3" in {c.move for c in result.candidates}
+
+
+def test_pure_history_with_legal_move_skips_engine(predictor, stub_engine):
+    result = predict(predictor, mode=PredictionMode.PURE_HISTORY)
+
+    assert stub_engine.calls == []
+    assert result.selected_move == "Bc4"
+    assert result.move_source.primary_source == "history"
+
+
+def test_pure_history_without_legal_move_falls_back_to_engine(predictor, stub_engine):
+    # Black's replies don't apply with White to move
+    history = [HistoryMove(move_san="Nc6", frequency=5), HistoryMove(move_san="Nf6", frequency=3)]
+    result = predict(predictor, mode=PredictionMode.PURE_HISTORY, history_moves=history)
+
+    assert [call[0] for call in stub_engine.calls] == ["analyze_position"]
+    assert result.selected_move == "Nf3"